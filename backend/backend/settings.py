@@ -172,7 +172,14 @@ load_dotenv()
 # URLs des services
 CHURN_URL = 'http://localhost:8001/predict/'
 RECOMMENDER_URL = 'http://localhost:8002/recommend/'
+# Churn + recommandations en un seul appel (hébergé par le service de churn)
+SCORING_URL = 'http://localhost:8001/score/'
+SCORING_BATCH_URL = 'http://localhost:8001/score/batch/'
+# Clients par appel à SCORING_BATCH_URL lors des imports CSV
+SCORING_BATCH_SIZE = 100
 SENTIMENT_URL = 'http://localhost:8003/analyze/'
+# Niveau de modèle de sentiment des imports CSV (ex. 'fast') ; vide = niveau par défaut du service
+SENTIMENT_BULK_TIER = os.getenv('SENTIMENT_BULK_TIER')
 MESSAGE_URL = 'http://127.0.0.1:8004/generate-message/'
 CUSTOM_MESSAGE_URL = 'http://localhost:8004/generate-custom-text/'
 
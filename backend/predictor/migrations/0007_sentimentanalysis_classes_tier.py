@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0006_generatedmessage_channel_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sentimentanalysis',
+            name='classes',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='sentimentanalysis',
+            name='tier',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+    ]
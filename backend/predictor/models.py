@@ -96,6 +96,9 @@ class SentimentAnalysis(models.Model):
     message = models.TextField()
     sentiment = models.CharField(max_length=20, choices=SENTIMENT_CHOICES)
     probabilities = models.JSONField(default=dict)  # Stocke les probabilités pour chaque classe
+    # Label de chaque entrée de probabilities (3 ou 5 classes selon le niveau de modèle)
+    classes = models.JSONField(default=list, blank=True)
+    tier = models.CharField(max_length=20, blank=True, default='')  # Niveau de modèle (accurate, fast)
     timestamp = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -246,7 +246,9 @@ class SentimentAnalysisView(APIView):
                 client=client,
                 message=payload.get("message", ""),
                 sentiment=result.get("sentiment", "inconnu"),
-                probabilities=result.get("probabilities", [])
+                probabilities=result.get("probabilities", []),
+                classes=result.get("classes", []),
+                tier=result.get("tier", "")
             )
 
             serializer = SentimentAnalysisSerializer(sentiment)
@@ -441,11 +443,14 @@ class FullClientProcessingView(APIView):
             'TotalCharges': float(data['TotalCharges'])
         }
 
-    def format_data_for_sentiment(self, data):
+    def format_data_for_sentiment(self, data, tier=None):
         """Formate les données pour le service de sentiment"""
-        return {
+        payload = {
             'text': data.get('message', '')
         }
+        if tier:
+            payload['tier'] = tier
+        return payload
 
     def call_service(self, service_url, data, service_name):
         """Appelle un service externe et gère les erreurs de connexion"""
@@ -472,6 +477,46 @@ class FullClientProcessingView(APIView):
                 print(f"Response: {e.response.text}")
             return None, str(e)
 
+    def call_scoring(self, payload):
+        """Churn et recommandations d'un client (données formatées) en un seul appel.
+
+        Si le scoring combiné échoue (recommandeur non chargé dans le service
+        de churn, service arrêté...), repli sur les services séparés.
+        Renvoie ``(churn_result, rec_result, churn_error, rec_error)``.
+        """
+        result, error = self.call_service(
+            settings.SCORING_URL,
+            payload,
+            "scoring churn + recommandation"
+        )
+        if result is not None:
+            return result["churn"], {"recommendations": result["recommendations"]}, None, None
+        churn_result, churn_error = self.call_service(settings.CHURN_URL, payload, "prédiction de churn")
+        rec_result, rec_error = self.call_service(settings.RECOMMENDER_URL, payload, "recommandation")
+        return churn_result, rec_result, churn_error, rec_error
+
+    def call_scoring_batch(self, payloads):
+        """``call_scoring`` pour une liste de clients, par lots de ``SCORING_BATCH_SIZE``.
+
+        Un lot refusé (client invalide, service indisponible) est repris client par client.
+        """
+        results = []
+        for start in range(0, len(payloads), settings.SCORING_BATCH_SIZE):
+            chunk = payloads[start:start + settings.SCORING_BATCH_SIZE]
+            scored, error = self.call_service(
+                settings.SCORING_BATCH_URL,
+                chunk,
+                "scoring churn + recommandation (lot)"
+            )
+            if scored is None or len(scored) != len(chunk):
+                results.extend(self.call_scoring(payload) for payload in chunk)
+                continue
+            results.extend(
+                (item["churn"], {"recommendations": item["recommendations"]}, None, None)
+                for item in scored
+            )
+        return results
+
     def post(self, request):
         # Vérifier si un fichier CSV a été fourni
         if 'file' in request.FILES:
@@ -501,29 +546,30 @@ class FullClientProcessingView(APIView):
 
                 results = []
                 errors = []
-                
-                # Traiter chaque ligne du CSV
+
+                # Churn et recommandations de tout le fichier par lots
+                rows = []
+                payloads = []
                 for row in reader:
                     try:
-                        # Appel au service de prédiction de churn
-                        churn_result, churn_error = self.call_service(
-                            settings.CHURN_URL,
-                            row,
-                            "prédiction de churn"
-                        )
+                        payloads.append(self.format_data_for_recommendation(row))
+                        rows.append(row)
+                    except (KeyError, TypeError, ValueError) as e:
+                        errors.append({
+                            'client_name': row.get('client_name', 'Unknown'),
+                            'error': str(e)
+                        })
+                scores = self.call_scoring_batch(payloads)
 
-                        # Appel au service de recommandation
-                        recommendation_data = self.format_data_for_recommendation(row)
-                        rec_result, rec_error = self.call_service(
-                            settings.RECOMMENDER_URL,
-                            recommendation_data,
-                            "recommandation"
-                        )
+                # Traiter chaque ligne du CSV
+                for row, (churn_result, rec_result, churn_error, rec_error) in zip(rows, scores):
+                    try:
 
                         # Si un message est fourni dans le CSV, faire l'analyse de sentiment
                         sentiment_result = None
                         if 'message' in row and row['message']:
-                            sentiment_data = self.format_data_for_sentiment(row)
+                            # Import en masse : niveau rapide du service si configuré
+                            sentiment_data = self.format_data_for_sentiment(row, settings.SENTIMENT_BULK_TIER)
                             sentiment_result, sentiment_error = self.call_service(
                                 settings.SENTIMENT_URL,
                                 sentiment_data,
@@ -588,11 +634,15 @@ class FullClientProcessingView(APIView):
                                 client=client,
                                 message=row.get('message', ''),
                                 sentiment=sentiment_result.get('label', ''),
-                                probabilities=sentiment_result.get('probabilities', [])
+                                probabilities=sentiment_result.get('probabilities', []),
+                                classes=sentiment_result.get('classes', []),
+                                tier=sentiment_result.get('tier', '')
                             )
                             client_results["sentiment"] = {
                                 "sentiment": sentiment_result.get('label', ''),
-                                "probabilities": sentiment_result.get('probabilities', [])
+                                "probabilities": sentiment_result.get('probabilities', []),
+                                "classes": sentiment_result.get('classes', []),
+                                "tier": sentiment_result.get('tier', '')
                             }
 
                         results.append({
@@ -637,16 +687,18 @@ class FullClientProcessingView(APIView):
         try:
             results = {}
 
-            # Appel au service de prédiction de churn
-            churn_result, churn_error = self.call_service(
-                settings.CHURN_URL,
-                request.data,
-                "prédiction de churn"
+            # Churn et recommandations en un seul appel
+            churn_result, rec_result, churn_error, rec_error = self.call_scoring(
+                self.format_data_for_recommendation(request.data)
             )
             if churn_result:
                 results["churn"] = churn_result
             if churn_error:
                 results["churn_error"] = churn_error
+            if rec_result:
+                results["recommendation"] = rec_result
+            if rec_error:
+                results["recommendation_error"] = rec_error
 
             # Si un message est fourni, analyse du sentiment
             if request.data.get('message'):
@@ -659,23 +711,13 @@ class FullClientProcessingView(APIView):
                 if sentiment_result:
                     results["sentiment"] = {
                         "sentiment": sentiment_result["label"],
-                        "probabilities": sentiment_result["probabilities"]
+                        "probabilities": sentiment_result["probabilities"],
+                        "classes": sentiment_result.get("classes", []),
+                        "tier": sentiment_result.get("tier", "")
                     }
                 if sentiment_error:
                     results["sentiment_error"] = sentiment_error
 
-            # Appel au service de recommandation avec les données formatées
-            recommendation_data = self.format_data_for_recommendation(request.data)
-            rec_result, rec_error = self.call_service(
-                settings.RECOMMENDER_URL,
-                recommendation_data,
-                "recommandation"
-            )
-            if rec_result:
-                results["recommendation"] = rec_result
-            if rec_error:
-                results["recommendation_error"] = rec_error
-
             # Sauvegarde du client et des résultats
             try:
                 client, _ = Client.objects.get_or_create(
@@ -730,7 +772,9 @@ class FullClientProcessingView(APIView):
                         client=client,
                         message=request.data.get("message", ""),
                         sentiment=results["sentiment"]["sentiment"],
-                        probabilities=results["sentiment"]["probabilities"]
+                        probabilities=results["sentiment"]["probabilities"],
+                        classes=results["sentiment"]["classes"],
+                        tier=results["sentiment"]["tier"]
                     )
 
             except Exception as e:
@@ -0,0 +1,361 @@
+"""Benchmark de latence et de débit des trois microservices de modèles.
+
+Chaque service est démarré dans son propre sous-processus (les trois exposent
+un paquet ``app``), depuis son répertoire, puis interrogé de deux façons :
+
+- ``inprocess`` : ``TestClient`` FastAPI, sans réseau ;
+- ``uvicorn`` : serveur uvicorn local sur un port libre, client HTTP httpx.
+
+Le scoring combiné (``scoring``) est servi par le service de churn.
+
+Modes mesurés : requêtes unitaires séquentielles, lots (si le service expose
+un endpoint batch) et clients concurrents. Les lignes rejouées viennent de
+``data/telco_churn.csv`` / ``training_data.csv`` ; le service de sentiment
+reçoit des messages clients types.
+
+Usage (depuis la racine du dépôt) :
+
+    python benchmarks/bench_services.py [--services churn,recommendation]
+        [--requests 200] [--batch-size 100] [--concurrency 8] [--ready-timeout 600]
+        [--with-cache] [--output bench.json] [--baseline ancien.json --threshold 0.15]
+
+Les sous-processus héritent de l'environnement. Les mêmes lignes étant
+rejouées dans chaque mode, les caches de prédictions, d'encodage et de
+tokenisation (``CACHE_VARIABLES``) sont désactivés par défaut pour mesurer
+les modèles eux-mêmes ; ``--with-cache`` les laisse actifs.
+
+Avec ``--baseline``, le script échoue (code 1) si une p95 augmente ou si un
+débit baisse de plus de ``--threshold`` par rapport au fichier de référence.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SENTIMENT_TEXTS = [
+    "je veux résilier",
+    "Merci beaucoup, le service est parfait.",
+    "Ma connexion coupe tous les soirs depuis une semaine, c'est inacceptable.",
+    "Pouvez-vous m'envoyer ma dernière facture ?",
+    "Le technicien n'est jamais venu et personne ne répond au téléphone. "
+    "Je paie pour un service que je n'ai pas, je vais aller voir la concurrence.",
+    "Très satisfait de la nouvelle offre fibre.",
+]
+
+# Tailles de cache mises à 0 dans les sous-processus, sauf avec --with-cache
+CACHE_VARIABLES = [
+    "CHURN_CACHE_SIZE",
+    "TELCO_FEATURE_CACHE_SIZE",
+    "SENTIMENT_RESULT_CACHE_SIZE",
+    "SENTIMENT_TOKEN_CACHE_SIZE",
+]
+
+SERVICES = {
+    "churn": {
+        "dir": "churn_model_service",
+        "data": "data/telco_churn.csv",
+        "single": "/predict",
+        "batch": "/predict/batch",
+    },
+    "recommendation": {
+        "dir": "recommendation_service",
+        "data": "training_data.csv",
+        "single": "/recommend",
+        "batch": "/recommend/batch",
+    },
+    "scoring": {
+        "dir": "churn_model_service",
+        "data": "data/telco_churn.csv",
+        "single": "/score",
+        "batch": "/score/batch",
+    },
+    "sentiment": {
+        "dir": "sentiment_service",
+        "data": None,
+        "single": "/predict",
+        "batch": "/predict/batch",
+    },
+}
+
+
+def load_payloads(service: dict, limit: int) -> list[dict]:
+    if service["data"] is None:
+        return [{"text": SENTIMENT_TEXTS[i % len(SENTIMENT_TEXTS)]} for i in range(limit)]
+
+    import pandas as pd
+
+    df = pd.read_csv(service["data"], sep=";", nrows=limit).drop(columns=["Churn"], errors="ignore")
+    df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce").fillna(0)
+    return df.to_dict(orient="records")
+
+
+def summarize(latencies: list[float], elapsed: float, items: int, errors: int) -> dict:
+    ms = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "items": items,
+        "errors": errors,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else None,
+        "p95_ms": float(np.percentile(ms, 95)) if len(ms) else None,
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else None,
+        "requests_per_s": len(latencies) / elapsed if elapsed else None,
+        "items_per_s": items / elapsed if elapsed else None,
+    }
+
+
+def run_sequential(post, path: str, bodies: list, items_per_body: int = 1) -> dict:
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for body in bodies:
+        t0 = time.perf_counter()
+        response = post(path, body)
+        latencies.append(time.perf_counter() - t0)
+        errors += response.status_code != 200
+    return summarize(latencies, time.perf_counter() - start, len(bodies) * items_per_body, errors)
+
+
+def run_concurrent_threads(make_post, path: str, bodies: list, concurrency: int) -> dict:
+    """Clients concurrents via threads ; ``make_post`` fournit la fonction d'envoi de chaque thread."""
+    latencies, errors, lock = [], [0], threading.Lock()
+    chunks = [bodies[i::concurrency] for i in range(concurrency)]
+
+    def worker(chunk):
+        post = make_post()
+        for body in chunk:
+            t0 = time.perf_counter()
+            response = post(path, body)
+            elapsed = time.perf_counter() - t0
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += response.status_code != 200
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - start, len(bodies), errors[0])
+
+
+async def run_concurrent_async(base_url: str, path: str, bodies: list, concurrency: int) -> dict:
+    """Clients HTTP concurrents sur un serveur uvicorn."""
+    import httpx
+
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                body = queue.get_nowait()
+                t0 = time.perf_counter()
+                response = await client.post(path, json=body)
+                latencies.append(time.perf_counter() - t0)
+                errors += response.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, len(bodies), errors)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(app):
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def wait_ready(client, timeout: float) -> float:
+    """Attend que ``/health`` ne réponde plus 503 ; échoue si le chargement a échoué ou dépasse ``timeout``."""
+    start = time.perf_counter()
+    while True:
+        response = client.get("/health")
+        if response.status_code != 503:
+            return time.perf_counter() - start
+        body = response.json()
+        if body.get("status") == "failed":
+            raise RuntimeError(f"Échec du chargement du modèle : {body.get('error')}")
+        if time.perf_counter() - start > timeout:
+            raise RuntimeError(f"Modèle non prêt après {timeout:.0f} s (statut {body.get('status')})")
+        time.sleep(0.1)
+
+
+def bench_service(name: str, n_requests: int, batch_size: int, concurrency: int, ready_timeout: float = 600) -> dict:
+    """Exécuté dans le sous-processus du service, avec son répertoire comme cwd."""
+    import httpx
+    from fastapi.testclient import TestClient
+
+    service = SERVICES[name]
+    sys.path.insert(0, os.getcwd())
+
+    start = time.perf_counter()
+    from app.main import app
+    startup_seconds = time.perf_counter() - start
+
+    payloads = load_payloads(service, max(n_requests, batch_size))
+    singles = [payloads[i % len(payloads)] for i in range(n_requests)]
+    n_batches = max(1, n_requests // batch_size)
+    batches = [payloads[:batch_size]] * n_batches
+    has_batch = any(route.path == service["batch"] for route in app.routes)
+
+    results = {"startup_seconds": startup_seconds}
+
+    with TestClient(app) as client:
+        # Modèle chargé en arrière-plan (sentiment) : on attend que /health soit prêt
+        wait_ready(client, ready_timeout)
+        results["ready_seconds"] = time.perf_counter() - start
+
+        def post(path, body):
+            return client.post(path, json=body)
+
+        def make_post():
+            return post
+
+        results["inprocess"] = {
+            "single": run_sequential(post, service["single"], singles),
+            "concurrent": run_concurrent_threads(make_post, service["single"], singles, concurrency),
+        }
+        if has_batch:
+            results["inprocess"]["batch"] = run_sequential(post, service["batch"], batches, batch_size)
+
+    server, thread, base_url = start_uvicorn(app)
+    try:
+        with httpx.Client(base_url=base_url, timeout=120) as client:
+            def post(path, body):
+                return client.post(path, json=body)
+
+            results["uvicorn"] = {
+                "single": run_sequential(post, service["single"], singles),
+                "concurrent": asyncio.run(run_concurrent_async(base_url, service["single"], singles, concurrency)),
+            }
+            if has_batch:
+                results["uvicorn"]["batch"] = run_sequential(post, service["batch"], batches, batch_size)
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    return results
+
+
+def run_in_subprocess(name: str, args) -> dict:
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker", name,
+        "--requests", str(args.requests), "--batch-size", str(args.batch_size),
+        "--concurrency", str(args.concurrency), "--ready-timeout", str(args.ready_timeout),
+    ]
+    env = dict(os.environ)
+    if not args.with_cache:
+        env.update({variable: "0" for variable in CACHE_VARIABLES})
+    completed = subprocess.run(command, cwd=os.path.join(ROOT_DIR, SERVICES[name]["dir"]),
+                               capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "échec"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Régressions de p95 et de débit au-delà du seuil relatif."""
+    regressions = []
+    for service, modes in current["services"].items():
+        for transport in ("inprocess", "uvicorn"):
+            for mode, stats in modes.get(transport, {}).items():
+                old = baseline.get("services", {}).get(service, {}).get(transport, {}).get(mode)
+                if not old:
+                    continue
+                label = f"{service}/{transport}/{mode}"
+                if old["p95_ms"] and stats["p95_ms"] > old["p95_ms"] * (1 + threshold):
+                    regressions.append(f"{label} : p95 {old['p95_ms']:.2f} -> {stats['p95_ms']:.2f} ms")
+                if old["items_per_s"] and stats["items_per_s"] < old["items_per_s"] * (1 - threshold):
+                    regressions.append(f"{label} : débit {old['items_per_s']:.1f} -> {stats['items_per_s']:.1f} /s")
+    return regressions
+
+
+def print_report(report: dict):
+    for service, results in report["services"].items():
+        if "error" in results:
+            print(f"{service:<15} ERREUR : {results['error']}")
+            continue
+        print(f"{service:<15} démarrage {results['startup_seconds']:.2f} s, prêt en {results['ready_seconds']:.2f} s")
+        for transport in ("inprocess", "uvicorn"):
+            for mode, stats in results[transport].items():
+                print(f"  {transport:<10} {mode:<11} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms"
+                      f"  p99 {stats['p99_ms']:8.2f} ms  {stats['requests_per_s']:8.1f} req/s"
+                      f"  {stats['items_per_s']:9.1f} clients/s  erreurs {stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--services", default=",".join(SERVICES))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ready-timeout", type=float, default=600,
+                        help="attente maximale (s) du chargement d'un modèle en arrière-plan")
+    parser.add_argument("--with-cache", action="store_true",
+                        help="garde les caches de prédictions actifs (mesure le cache, pas le modèle)")
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(bench_service(args.worker, args.requests, args.batch_size, args.concurrency,
+                                       args.ready_timeout)))
+        return
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count()},
+        "settings": {"requests": args.requests, "batch_size": args.batch_size,
+                     "concurrency": args.concurrency, "with_cache": args.with_cache},
+        "services": {},
+    }
+    for name in args.services.split(","):
+        name = name.strip()
+        print(f"Benchmark du service {name}...", file=sys.stderr)
+        report["services"][name] = run_in_subprocess(name, args)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print_report(report)
+    print(f"Résultats écrits dans {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Scoring combiné churn + recommandations dans le processus du service de churn.
+
+Le service de recommandation est importé tel quel depuis son répertoire
+(``RECOMMENDATION_SERVICE_DIR``, par défaut ``../recommendation_service`` ;
+vide pour désactiver). Ses modules portent eux aussi le nom de paquet ``app`` :
+ils sont chargés sous l'alias ``recommendation_app`` sans toucher aux modules
+``app`` du service de churn. Les deux pipelines partagent alors l'encodage
+``telco_features`` : chaque client n'est validé et encodé qu'une fois.
+
+Le service de recommandation n'est chargé qu'au premier appel de ``/score``
+(mémoire et temps de démarrage épargnés aux workers qui ne servent que
+``/predict``). ``SCORE_PRELOAD=1`` le charge dès l'import, pour ne pas faire
+payer ce chargement à la première requête.
+"""
+import importlib
+import importlib.machinery
+import importlib.util
+import os
+import sys
+import threading
+
+from app.model import predict_churn_batch
+from app.schemas import ClientData
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ALIAS = "recommendation_app"
+
+
+def import_service_module(service_dir: str, module: str = "app.model", alias: str = ALIAS):
+    """Importe ``module`` d'un autre service et l'enregistre sous ``alias``."""
+    def is_app(name):
+        return name == "app" or name.startswith("app.")
+
+    saved = {name: sys.modules.pop(name) for name in list(sys.modules) if is_app(name)}
+    spec = importlib.machinery.ModuleSpec("app", None, is_package=True)
+    spec.submodule_search_locations = [os.path.join(service_dir, "app")]
+    sys.modules["app"] = importlib.util.module_from_spec(spec)
+    try:
+        return importlib.import_module(module)
+    finally:
+        loaded = {name: sys.modules.pop(name) for name in list(sys.modules) if is_app(name)}
+        sys.modules.update({alias + name[len("app"):]: mod for name, mod in loaded.items()})
+        sys.modules.update(saved)
+
+
+def load_recommender():
+    """(module ``model`` du service de recommandation ou ``None``, raison de l'indisponibilité).
+
+    Un échec de chargement (modèle non entraîné, catalogue invalide...) ne doit
+    pas empêcher le service de churn de démarrer : seul ``/score`` est indisponible.
+    """
+    service_dir = os.getenv("RECOMMENDATION_SERVICE_DIR", os.path.join(SERVICE_DIR, "..", "recommendation_service"))
+    if not service_dir or not os.path.isdir(os.path.join(service_dir, "app")):
+        return None, "non configuré (RECOMMENDATION_SERVICE_DIR)"
+    try:
+        return import_service_module(os.path.abspath(service_dir)), None
+    except Exception as e:
+        print(f"Service de recommandation non chargé : {e!r}", file=sys.stderr)
+        return None, f"échec du chargement : {e}"
+
+
+_recommender = None
+_lock = threading.Lock()
+
+
+def get_recommender():
+    """Comme ``load_recommender``, chargé une seule fois par processus au premier appel."""
+    global _recommender
+    with _lock:
+        if _recommender is None:
+            _recommender = load_recommender()
+        return _recommender
+
+
+if os.getenv("SCORE_PRELOAD", "0") == "1":
+    get_recommender()
+
+
+def score_clients(clients: list[ClientData]):
+    """Churn et recommandations d'un lot de clients, dans l'ordre reçu."""
+    recommender, _ = get_recommender()
+    predictions = predict_churn_batch(clients)
+    records = [client.dict(by_alias=True) for client in clients]
+    recommendations = recommender.recommend_actions_batch(records) if records else []
+    return [
+        {"churn": prediction, "recommendations": offers}
+        for prediction, offers in zip(predictions, recommendations)
+    ]
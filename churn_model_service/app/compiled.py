@@ -0,0 +1,235 @@
+"""Inférence compilée du pipeline de churn, sans pandas ni sklearn.
+
+Le pipeline sauvegardé (OneHotEncoder + StandardScaler + RandomForest) est
+exporté une fois en tableaux NumPy plats ; un client est ensuite encodé par
+simples recherches dans des dictionnaires et les 100 arbres sont parcourus
+ensemble, niveau par niveau.
+
+Vérification de parité avec le pipeline sklearn (probabilités et
+contributions) sur le modèle entraîné :
+
+    python -m app.compiled [data/telco_churn.csv]
+
+La même parité est testée automatiquement sur un petit pipeline :
+
+    python -m pytest -q tests
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.explain import build_column_map, build_path_tables
+
+
+class CompiledModel:
+    """Pipeline de churn exporté en tableaux plats (encodeur, scaler, arbres)."""
+
+    def __init__(self, arrays: dict, meta: dict):
+        self.arrays = arrays
+        self.meta = meta
+        self.raw_columns = meta["raw_columns"]
+        self.n_outputs = meta["n_outputs"]
+        self.max_depth = meta["max_depth"]
+        self.bias = meta["bias"]
+
+        # Tables de recherche : colonne catégorielle -> {valeur: index one-hot}
+        self.categories = {
+            column: dict(zip(values, range(start, start + len(values))))
+            for column, start, values in meta["categorical"]
+        }
+        self.numeric = list(zip(meta["numeric_columns"], arrays["numeric_index"].tolist()))
+
+        for name in ("left", "right", "feature", "threshold", "value",
+                     "roots", "node_features", "node_deltas", "mean", "scale"):
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def from_pipeline(cls, pipeline, positive_class=1):
+        preprocessor = pipeline.named_steps['preprocessor']
+        forest = pipeline.named_steps['classifier']
+        raw_columns = list(pipeline.feature_names_in_)
+        column_map = build_column_map(preprocessor, raw_columns)
+
+        categorical, numeric_columns, numeric_index, mean, scale = [], [], [], [], []
+        for name, transformer, columns in preprocessor.transformers_:
+            output = preprocessor.output_indices_[name]
+            if output.stop == output.start:
+                continue
+            if hasattr(transformer, "categories_"):
+                if getattr(transformer, "drop_idx_", None) is not None:
+                    raise ValueError("OneHotEncoder avec 'drop' non supporté en mode compilé")
+                start = output.start
+                for column, values in zip(columns, transformer.categories_):
+                    categorical.append((column, start, [str(v) for v in values]))
+                    start += len(values)
+            elif hasattr(transformer, "scale_") or hasattr(transformer, "mean_"):
+                n = len(columns)
+                numeric_columns.extend(columns)
+                numeric_index.extend(range(output.start, output.start + n))
+                mean.extend(transformer.mean_ if transformer.mean_ is not None else np.zeros(n))
+                scale.extend(transformer.scale_ if transformer.scale_ is not None else np.ones(n))
+            else:
+                raise ValueError(f"Transformateur '{name}' non supporté en mode compilé")
+
+        # Arbres concaténés dans l'ordre de forest.decision_path ; les feuilles
+        # bouclent sur elles-mêmes pour que le parcours puisse avancer en bloc.
+        class_index = list(forest.classes_).index(positive_class)
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+            left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            values = tree.value[:, 0, :]
+            value.append(values[:, class_index] / values.sum(axis=1))
+            roots.append(offset)
+            offset += tree.node_count
+
+        node_features, node_deltas, bias, _ = build_path_tables(forest, column_map, positive_class)
+
+        arrays = {
+            "left": np.concatenate(left).astype(np.int32),
+            "right": np.concatenate(right).astype(np.int32),
+            "feature": np.concatenate(feature).astype(np.int32),
+            "threshold": np.concatenate(threshold),
+            "value": np.concatenate(value),
+            "roots": np.asarray(roots, dtype=np.int32),
+            "node_features": node_features.astype(np.int32),
+            "node_deltas": node_deltas,
+            "numeric_index": np.asarray(numeric_index, dtype=np.int32),
+            "mean": np.asarray(mean, dtype=np.float64),
+            "scale": np.asarray(scale, dtype=np.float64),
+        }
+        meta = {
+            "raw_columns": raw_columns,
+            "n_outputs": int(len(column_map)),
+            "max_depth": int(max(e.tree_.max_depth for e in forest.estimators_)),
+            "bias": bias,
+            "categorical": categorical,
+            "numeric_columns": numeric_columns,
+        }
+        return cls(arrays, meta)
+
+    def encode(self, records: list[dict]) -> np.ndarray:
+        """Encode des clients (dicts aliasés) comme le ferait le ColumnTransformer."""
+        X = np.zeros((len(records), self.n_outputs), dtype=np.float64)
+        for row, record in enumerate(records):
+            for column, lookup in self.categories.items():
+                index = lookup.get(str(record[column]))
+                if index is not None:  # catégorie inconnue : tout à zéro (handle_unknown='ignore')
+                    X[row, index] = 1.0
+            for column, index in self.numeric:
+                X[row, index] = record[column]
+        numeric_index = self.arrays["numeric_index"]
+        X[:, numeric_index] = (X[:, numeric_index] - self.mean) / self.scale
+        # Les arbres sklearn comparent des entrées float32 aux seuils float64
+        return X.astype(np.float32)
+
+    def feature_spec(self) -> dict:
+        """Description de l'encodage au format de ``telco_features.spec_from_preprocessor``."""
+        numeric = zip(self.meta["numeric_columns"], self.arrays["numeric_index"].tolist(),
+                      np.asarray(self.mean).tolist(), np.asarray(self.scale).tolist())
+        return {
+            "categorical": self.meta["categorical"],
+            "numeric": list(numeric),
+            "n_outputs": self.n_outputs,
+        }
+
+    def score(self, X: np.ndarray, explain: bool = True):
+        """Probabilités de churn et contributions par colonne brute pour un lot encodé."""
+        n_rows, n_raw = len(X), len(self.raw_columns)
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        row_ids = np.broadcast_to(rows, nodes.shape)
+        visited_rows, visited_nodes = [], []
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            next_nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            moved = next_nodes != nodes
+            if not moved.any():
+                break
+            if explain:
+                visited_rows.append(row_ids[moved])
+                visited_nodes.append(next_nodes[moved])
+            nodes = next_nodes
+
+        contributions = np.zeros((n_rows, n_raw))
+        if visited_nodes:
+            reached = np.concatenate(visited_nodes)
+            flat = np.concatenate(visited_rows) * n_raw + self.node_features[reached]
+            contributions = np.bincount(flat, weights=self.node_deltas[reached],
+                                        minlength=n_rows * n_raw).reshape(n_rows, n_raw)
+
+        probabilities = self.value[nodes].mean(axis=1)
+        return probabilities, contributions
+
+    def predict_proba(self, records: list[dict]) -> np.ndarray:
+        return self.score(self.encode(records), explain=False)[0]
+
+    def astype(self, float_dtype) -> "CompiledModel":
+        """Copie dont seuils, valeurs des feuilles et contributions sont en ``float_dtype``."""
+        arrays = dict(self.arrays)
+        for name in ("value", "node_deltas"):
+            arrays[name] = arrays[name].astype(float_dtype)
+
+        # Les entrées étant en float32, arrondir chaque seuil vers le bas garde
+        # exactement les mêmes décisions que le seuil float64 d'origine.
+        threshold = np.asarray(self.arrays["threshold"])
+        rounded = threshold.astype(float_dtype)
+        too_high = rounded > threshold
+        rounded[too_high] = np.nextafter(rounded[too_high], np.array(-np.inf, dtype=float_dtype))
+        arrays["threshold"] = rounded
+        return CompiledModel(arrays, self.meta)
+
+
+def check_parity(pipeline, compiled: CompiledModel, df) -> dict:
+    """Écarts maximaux entre le pipeline sklearn et le mode compilé sur ``df``."""
+    from app.explain import TreeExplainer
+
+    expected = pipeline.predict_proba(df)[:, 1]
+    expected_contributions = TreeExplainer(pipeline).explain(
+        pipeline.named_steps['preprocessor'].transform(df)
+    )
+    probabilities, contributions = compiled.score(compiled.encode(df.to_dict(orient="records")))
+    return {
+        "rows": len(df),
+        "max_proba_diff": float(np.abs(probabilities - expected).max()),
+        "max_contribution_diff": float(np.abs(contributions - expected_contributions).max()),
+    }
+
+
+if __name__ == "__main__":
+    import joblib
+    import pandas as pd
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "data/telco_churn.csv"
+    df = pd.read_csv(path, sep=";").drop(columns=["Churn"], errors="ignore")
+    df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce")
+    df["TotalCharges"] = df["TotalCharges"].fillna(df["TotalCharges"].median())
+
+    pipeline = joblib.load("model.joblib")
+    compiled = CompiledModel.from_pipeline(pipeline)
+
+    report = check_parity(pipeline, compiled, df)
+    print(report)
+
+    record = df.iloc[[0]].to_dict(orient="records")
+    n_runs = 1000
+    start = time.perf_counter()
+    for _ in range(n_runs):
+        compiled.score(compiled.encode(record))
+    compiled_ms = (time.perf_counter() - start) / n_runs * 1000
+    start = time.perf_counter()
+    for _ in range(50):
+        pipeline.predict_proba(df.iloc[[0]])
+    sklearn_ms = (time.perf_counter() - start) / 50 * 1000
+    print(f"1 client : compilé {compiled_ms:.3f} ms, sklearn {sklearn_ms:.3f} ms")
+
+    if report["max_proba_diff"] > 1e-9 or report["max_contribution_diff"] > 1e-9:
+        sys.exit("Parité non respectée entre le pipeline sklearn et le mode compilé")
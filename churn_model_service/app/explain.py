@@ -0,0 +1,128 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+def build_column_map(preprocessor, raw_columns) -> np.ndarray:
+    """Associe chaque colonne transformée (one-hot / scalée) à sa colonne brute."""
+    index = {column: i for i, column in enumerate(raw_columns)}
+    n_outputs = max(indices.stop for indices in preprocessor.output_indices_.values())
+    column_map = np.zeros(n_outputs, dtype=np.intp)
+
+    for name, transformer, columns in preprocessor.transformers_:
+        output = preprocessor.output_indices_[name]
+        if output.stop == output.start:
+            continue
+        if hasattr(transformer, "categories_"):
+            widths = [len(categories) for categories in transformer.categories_]
+        else:
+            widths = [1] * len(columns)
+        column_map[output] = np.repeat([index[column] for column in columns], widths)
+
+    return column_map
+
+
+def build_path_tables(forest, column_map, positive_class=1):
+    """Pré-calcule, pour chaque noeud de la forêt, la colonne brute et la variation de probabilité.
+
+    Les noeuds sont numérotés comme dans ``forest.decision_path`` (arbres concaténés).
+    La contribution d'une colonne pour un client est la somme des variations des
+    noeuds traversés dont le parent sépare sur cette colonne ; sa probabilité est
+    la somme des ``leaf_values`` (probabilité de la feuille / nombre d'arbres).
+    """
+    class_index = list(forest.classes_).index(positive_class)
+    n_trees = len(forest.estimators_)
+    node_features, node_deltas, leaf_values, roots = [], [], [], []
+
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        values = tree.value[:, 0, :]
+        proba = values[:, class_index] / values.sum(axis=1)
+
+        internal = np.flatnonzero(tree.children_left >= 0)
+        parent = np.zeros(tree.node_count, dtype=np.intp)
+        parent[tree.children_left[internal]] = internal
+        parent[tree.children_right[internal]] = internal
+
+        delta = proba - proba[parent]
+        delta[0] = 0.0
+        feature = column_map[tree.feature[parent]]
+        feature[0] = 0
+
+        node_features.append(feature)
+        node_deltas.append(delta / n_trees)
+        leaf_values.append(np.where(tree.children_left < 0, proba, 0.0) / n_trees)
+        roots.append(proba[0])
+
+    return (np.concatenate(node_features), np.concatenate(node_deltas),
+            float(np.mean(roots)), np.concatenate(leaf_values))
+
+
+def build_leaf_tables(forest, node_features, node_deltas, leaf_values, n_raw):
+    """Pour chaque feuille : contributions cumulées le long de son chemin, puis probabilité.
+
+    Un chemin racine -> feuille est unique : une fois ces cumuls calculés, un
+    client n'a besoin que de ses feuilles (``forest.apply``), sans
+    ``decision_path``. Renvoie (décalage de chaque arbre, ligne de chaque
+    noeud dans la table ou -1, table n_feuilles x (n_colonnes_brutes + 1)).
+    """
+    offsets, left, right = [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        offsets.append(offset)
+        left.append(np.where(tree.children_left >= 0, tree.children_left + offset, -1))
+        right.append(np.where(tree.children_right >= 0, tree.children_right + offset, -1))
+        offset += tree.node_count
+    offsets, left, right = np.asarray(offsets), np.concatenate(left), np.concatenate(right)
+
+    cumulative = np.zeros((offset, n_raw))
+    level = offsets
+    while level.size:
+        parents = np.concatenate([level, level])
+        children = np.concatenate([left[level], right[level]])
+        keep = children >= 0
+        parents, children = parents[keep], children[keep]
+        cumulative[children] = cumulative[parents]
+        cumulative[children, node_features[children]] += node_deltas[children]
+        level = children
+
+    leaves = np.flatnonzero(left < 0)
+    leaf_rows = np.full(offset, -1, dtype=np.int64)
+    leaf_rows[leaves] = np.arange(len(leaves))
+    return offsets, leaf_rows, np.column_stack([cumulative[leaves], leaf_values[leaves]])
+
+
+class TreeExplainer:
+    """Explications par client pour un pipeline preprocessor + RandomForest.
+
+    Toutes les tables sont construites une seule fois au chargement du modèle ;
+    ``score`` ne fait ensuite qu'un parcours de la forêt (``forest.apply``) et
+    un produit matriciel creux pour tout le lot : probabilités et contributions
+    sortent des mêmes feuilles.
+    """
+
+    def __init__(self, pipeline, positive_class=1):
+        self.forest = pipeline.named_steps['classifier']
+        self.raw_columns = list(pipeline.feature_names_in_)
+        self.column_map = build_column_map(pipeline.named_steps['preprocessor'], self.raw_columns)
+        self.node_features, self.node_deltas, self.bias, self.leaf_values = build_path_tables(
+            self.forest, self.column_map, positive_class
+        )
+        self.offsets, self.leaf_rows, self.leaf_tables = build_leaf_tables(
+            self.forest, self.node_features, self.node_deltas, self.leaf_values, len(self.raw_columns)
+        )
+
+    def score(self, transformed):
+        """(probabilités de churn, contributions n_clients x n_colonnes_brutes) en un parcours."""
+        rows = self.leaf_rows[self.forest.apply(transformed) + self.offsets]
+        n_clients, n_trees = rows.shape
+        indicator = csr_matrix(
+            (np.ones(rows.size), rows.ravel(), np.arange(0, rows.size + 1, n_trees)),
+            shape=(n_clients, len(self.leaf_tables))
+        )
+        totals = indicator @ self.leaf_tables
+        return totals[:, -1], totals[:, :-1]
+
+    def explain(self, transformed) -> np.ndarray:
+        """Contributions (n_clients x n_colonnes_brutes) à la probabilité de churn."""
+        return self.score(transformed)[1]
@@ -0,0 +1,147 @@
+"""Export de variantes compactes du modèle de churn, avec rapport précision / latence.
+
+Chaque variante est réentraînée sur le même découpage apprentissage/test que
+le modèle complet, avec ses contraintes (profondeur, nombre de feuilles,
+élagage coût-complexité ``ccp_alpha``, nombre d'arbres), puis exportée :
+
+- ``<sortie>/<variante>/model.joblib`` : le pipeline sklearn ;
+- ``<sortie>/<variante>/model_arrays/<version>/`` : ses tableaux compilés, seuils
+  et valeurs en float32, là où ``CHURN_MODEL_MMAP=1`` les cherche par défaut.
+
+Pour servir une variante :
+
+    CHURN_MODEL_PATH=<sortie>/<variante>/model.joblib CHURN_MODEL_MMAP=1 uvicorn app.main:app
+
+Le rapport donne, par variante : taille sur disque, temps de chargement,
+latence par client (sklearn et compilé), AUC et écart d'AUC au modèle complet.
+
+Usage (depuis la racine du service) :
+
+    python -m app.export_compact [--output compact_models] [--variants full,depth8]
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from app.compiled import CompiledModel
+from app.loader import load_arrays, model_fingerprint, save_arrays
+from app.tune_model import load_dataset, make_preprocessor
+
+# Variantes : nom -> paramètres du RandomForest (le modèle complet est la référence)
+VARIANTS = {
+    "full": {},
+    "depth12": {"max_depth": 12},
+    "depth8": {"max_depth": 8},
+    "leaves256": {"max_leaf_nodes": 256},
+    "ccp": {"ccp_alpha": 0.0002},
+    "depth10_trees50": {"max_depth": 10, "n_estimators": 50},
+}
+
+LATENCY_RUNS = 200
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+def median_ms(fn, runs: int = LATENCY_RUNS) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def export_variant(name: str, params: dict, X_train, y_train, X_test, y_test, output_dir: str) -> dict:
+    clf = Pipeline(steps=[
+        ('preprocessor', make_preprocessor(X_train)),
+        ('classifier', RandomForestClassifier(**{"n_estimators": 100, "random_state": 42, **params}))
+    ])
+    clf.fit(X_train, y_train)
+
+    variant_dir = os.path.join(output_dir, name)
+    os.makedirs(variant_dir, exist_ok=True)
+    model_path = os.path.join(variant_dir, "model.joblib")
+    joblib.dump(clf, model_path)
+
+    compiled = CompiledModel.from_pipeline(clf).astype(np.float32)
+    # L'export possède ce répertoire : des tableaux d'un export précédent (même
+    # empreinte joblib, autre code d'export) ne doivent jamais être réutilisés
+    arrays_root = os.path.join(variant_dir, "model_arrays")
+    shutil.rmtree(arrays_root, ignore_errors=True)
+    arrays_dir = os.path.join(arrays_root, model_fingerprint(model_path))
+    save_arrays(compiled, arrays_dir)
+
+    start = time.perf_counter()
+    joblib.load(model_path)
+    joblib_load_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    compiled = load_arrays(arrays_dir)
+    arrays_load_ms = (time.perf_counter() - start) * 1000
+
+    expected = clf.predict_proba(X_test)[:, 1]
+    probabilities, _ = compiled.score(compiled.encode(X_test.to_dict(orient="records")))
+
+    row_df = X_test.iloc[[0]]
+    row_records = row_df.to_dict(orient="records")
+    forest = clf.named_steps['classifier']
+
+    return {
+        "variant": name,
+        "params": json.dumps(params),
+        "n_nodes": int(sum(e.tree_.node_count for e in forest.estimators_)),
+        "joblib_mb": os.path.getsize(model_path) / 1e6,
+        "arrays_mb": directory_size(arrays_dir) / 1e6,
+        "joblib_load_ms": joblib_load_ms,
+        "arrays_load_ms": arrays_load_ms,
+        "sklearn_row_ms": median_ms(lambda: clf.predict_proba(row_df), runs=LATENCY_RUNS // 4),
+        "compiled_row_ms": median_ms(lambda: compiled.score(compiled.encode(row_records))),
+        "auc": roc_auc_score(y_test, expected),
+        "auc_float32": roc_auc_score(y_test, probabilities),
+        "max_float32_diff": float(np.abs(probabilities - expected).max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data/telco_churn.csv")
+    parser.add_argument("--output", default="compact_models")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="sous-ensemble de " + ",".join(VARIANTS))
+    args = parser.parse_args()
+
+    X, y = load_dataset(args.data)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+
+    names = [name.strip() for name in args.variants.split(",") if name.strip()]
+    if "full" not in names:
+        names.insert(0, "full")
+
+    rows = []
+    for name in names:
+        print(f"Export de la variante {name}...")
+        rows.append(export_variant(name, VARIANTS[name], X_train, y_train, X_test, y_test, args.output))
+
+    report = pd.DataFrame(rows)
+    report["auc_delta"] = report["auc"] - report.loc[report["variant"] == "full", "auc"].iloc[0]
+    report.to_csv(os.path.join(args.output, "report.csv"), index=False)
+    with pd.option_context("display.width", 250, "display.max_columns", None):
+        print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"Rapport sauvegardé dans {os.path.join(args.output, 'report.csv')}")
+
+
+if __name__ == "__main__":
+    main()
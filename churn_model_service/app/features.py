@@ -0,0 +1,23 @@
+"""Import de l'encodage partagé ``telco_features`` (paquet à la racine du dépôt).
+
+Le paquet est optionnel : s'il est absent (service déployé seul),
+``shared_encoder`` vaut ``None``, ``register`` aussi renvoie ``None`` et le
+service garde le prétraitement de son propre pipeline. Désactivation et
+taille du cache : voir ``telco_features``.
+"""
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Les services sont lancés depuis leur propre répertoire
+if os.path.isdir(os.path.join(REPO_DIR, "telco_features")) and REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
+
+try:
+    from telco_features import register, shared_encoder
+except ImportError:
+    shared_encoder = None
+
+    def register(spec_or_preprocessor):
+        return None
@@ -0,0 +1,191 @@
+"""Chargement du modèle de churn : chemins configurables, tableaux partagés, préchauffage.
+
+Variables d'environnement :
+
+- ``CHURN_MODEL_PATH`` : chemin du pipeline ``model.joblib``
+  (par défaut à la racine du service) ;
+- ``CHURN_MODEL_DIR`` : seul répertoire d'où ``POST /models/load`` peut
+  charger un artefact (par défaut celui de ``CHURN_MODEL_PATH``) ; un
+  ``.joblib`` est désérialisé avec pickle, aucun autre chemin n'est accepté ;
+- ``CHURN_MODEL_MMAP=1`` : sert le modèle depuis ses tableaux compilés, stockés
+  en ``.npy`` et ouverts avec ``mmap_mode='r'`` : tous les workers uvicorn d'un
+  noeud partagent alors les mêmes pages au lieu de désérialiser chacun la forêt ;
+- ``CHURN_MODEL_ARRAYS_DIR`` : répertoire de ces tableaux
+  (par défaut à côté du pipeline) ;
+- ``CHURN_COMPILED_INFERENCE=1`` : mode compilé sans mmap (voir ``app.compiled``) ;
+- ``CHURN_WARMUP_DATA`` : CSV (schéma ``telco_churn.csv``) dont les premières
+  lignes servent au préchauffage (par défaut ``data/telco_churn.csv``).
+
+Quand le paquet ``telco_features`` est disponible (voir ``app.features``), les
+clients sont encodés par l'encodeur partagé, avec son cache, au lieu du
+``ColumnTransformer`` ou de ``CompiledModel.encode``.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.compiled import CompiledModel
+from app.explain import TreeExplainer
+from app.features import register, shared_encoder
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Client type utilisé pour la prédiction de préchauffage
+WARMUP_CLIENT = {
+    "gender": "Female", "SeniorCitizen": 0, "Partner": "Yes", "Dependents": "No",
+    "tenure": 1, "PhoneService": "No", "MultipleLines": "No phone service",
+    "InternetService": "DSL", "OnlineSecurity": "No", "OnlineBackup": "Yes",
+    "DeviceProtection": "No", "TechSupport": "No", "StreamingTV": "No",
+    "StreamingMovies": "No", "Contract": "Month-to-month", "PaperlessBilling": "Yes",
+    "PaymentMethod": "Electronic check", "MonthlyCharges": 29.85, "TotalCharges": 29.85
+}
+
+
+def resolve_model_path(path: str = None) -> str:
+    path = path or os.getenv("CHURN_MODEL_PATH", "model.joblib")
+    if not os.path.isabs(path):
+        path = os.path.join(SERVICE_DIR, path)
+    return path
+
+
+def models_dir() -> str:
+    directory = os.getenv("CHURN_MODEL_DIR") or os.path.dirname(resolve_model_path())
+    if not os.path.isabs(directory):
+        directory = os.path.join(SERVICE_DIR, directory)
+    return os.path.realpath(directory)
+
+
+def resolve_request_path(path: str = None) -> str:
+    """Artefact demandé par l'API : un fichier ``.joblib`` de ``models_dir()``, sinon ValueError."""
+    if not path:
+        return resolve_model_path()
+    directory = models_dir()
+    # realpath : ni « .. » ni lien symbolique ne sortent du répertoire
+    candidate = os.path.realpath(os.path.join(directory, path))
+    if os.path.commonpath([candidate, directory]) != directory:
+        raise ValueError(f"Seuls les artefacts de {directory} peuvent être chargés")
+    if not candidate.endswith(".joblib") or not os.path.isfile(candidate):
+        raise ValueError(f"Artefact introuvable dans {directory} : {path}")
+    return candidate
+
+
+def model_fingerprint(path: str) -> str:
+    """Empreinte courte du fichier modèle, utilisée comme numéro de version."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class ServingModel:
+    """Modèle prêt à servir : pipeline sklearn et/ou tableaux compilés."""
+
+    def __init__(self, version: str, pipeline=None, compiled: CompiledModel = None):
+        self.version = version
+        self.pipeline = pipeline
+        self.compiled = compiled
+        self.explainer = TreeExplainer(pipeline) if pipeline is not None and compiled is None else None
+        self.raw_columns = compiled.raw_columns if compiled is not None else self.explainer.raw_columns
+        # Vue de l'encodage partagé, ou None si indisponible
+        self.features = register(
+            compiled.feature_spec() if compiled is not None else pipeline.named_steps['preprocessor']
+        )
+
+    def score(self, records: list[dict]):
+        """Probabilités de churn et contributions par colonne brute pour des dicts aliasés."""
+        if self.features is not None:
+            transformed = self.features.transform(shared_encoder.encode(records))
+            if self.compiled is not None:
+                return self.compiled.score(transformed)
+            # Probabilités et contributions d'un seul parcours de la forêt
+            return self.explainer.score(transformed)
+
+        if self.compiled is not None:
+            return self.compiled.score(self.compiled.encode(records))
+
+        input_df = pd.DataFrame(records)
+
+        expected_columns = self.pipeline.feature_names_in_
+        missing_cols = set(expected_columns) - set(input_df.columns)
+        if missing_cols:
+            raise ValueError(f"Colonnes manquantes : {missing_cols}")
+
+        # Prétraitement et prédiction vectorisés sur l'ensemble du lot
+        transformed = self.pipeline.named_steps['preprocessor'].transform(input_df)
+        return self.explainer.score(transformed)
+
+
+def save_arrays(compiled: CompiledModel, directory: str):
+    """Écrit les tableaux compilés (un ``.npy`` par tableau) de façon atomique."""
+    parent = os.path.dirname(directory) or "."
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".arrays-", dir=parent)
+    for name, array in compiled.arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(compiled.meta, f)
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:
+        # Un autre worker a exporté la même version entre-temps
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+
+def load_arrays(directory: str, mmap_mode: str = "r") -> CompiledModel:
+    with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    arrays = {
+        name[:-len(".npy")]: np.load(os.path.join(directory, name), mmap_mode=mmap_mode)
+        for name in os.listdir(directory) if name.endswith(".npy")
+    }
+    return CompiledModel(arrays, meta)
+
+
+def load_warmup_records(limit: int = 64) -> list[dict]:
+    """Premières lignes du CSV de préchauffage, ou le client type si le fichier manque."""
+    path = os.getenv("CHURN_WARMUP_DATA", "data/telco_churn.csv")
+    if not os.path.isabs(path):
+        path = os.path.join(SERVICE_DIR, path)
+    if not os.path.exists(path):
+        return [WARMUP_CLIENT]
+
+    df = pd.read_csv(path, sep=";", nrows=limit).drop(columns=["Churn"], errors="ignore")
+    df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce").fillna(0)
+    return df.to_dict(orient="records")
+
+
+def warm_up(serving_model: ServingModel, records: list[dict] = None):
+    """Prédictions à blanc (un client puis un lot) avant la première vraie requête."""
+    records = records or load_warmup_records()
+    serving_model.score(records[:1])
+    serving_model.score(records)
+
+
+def load_model(path: str = None) -> ServingModel:
+    path = resolve_model_path(path)
+    version = model_fingerprint(path)
+
+    if os.getenv("CHURN_MODEL_MMAP", "0") == "1":
+        # Répertoire versionné : un nouveau modèle ne réutilise jamais d'anciens tableaux
+        base_dir = os.getenv("CHURN_MODEL_ARRAYS_DIR", os.path.splitext(path)[0] + "_arrays")
+        arrays_dir = os.path.join(base_dir, version)
+        if not os.path.isdir(arrays_dir):
+            save_arrays(CompiledModel.from_pipeline(joblib.load(path)), arrays_dir)
+        serving_model = ServingModel(version, compiled=load_arrays(arrays_dir))
+    else:
+        pipeline = joblib.load(path)
+        compiled = None
+        if os.getenv("CHURN_COMPILED_INFERENCE", "0") == "1":
+            compiled = CompiledModel.from_pipeline(pipeline)
+        serving_model = ServingModel(version, pipeline=pipeline, compiled=compiled)
+
+    warm_up(serving_model)
+    return serving_model
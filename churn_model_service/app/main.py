@@ -1,6 +1,9 @@
-from fastapi import FastAPI
-from app.model import predict_churn
-from app.schemas import ClientData, Prediction
+from fastapi import FastAPI, HTTPException
+from app.combined import get_recommender, score_clients
+from app.features import shared_encoder
+from app.loader import resolve_request_path
+from app.model import predict_churn, predict_churn_batch, prediction_cache, registry
+from app.schemas import ClientData, ClientScore, ModelLoadRequest, Prediction
 
 app = FastAPI(title="Churn Prediction Microservice")
 
@@ -8,3 +11,58 @@ app = FastAPI(title="Churn Prediction Microservice")
 def predict(data: ClientData):
     result = predict_churn(data)
     return result
+
+@app.post("/predict/batch", response_model=list[Prediction])
+def predict_batch(data: list[ClientData]):
+    """Score une liste de clients en un seul passage du modèle (ordre conservé)."""
+    return predict_churn_batch(data)
+
+@app.post("/score", response_model=ClientScore)
+def score(data: ClientData):
+    """Churn et recommandations d'un client en un seul appel."""
+    return score_batch([data])[0]
+
+@app.post("/score/batch", response_model=list[ClientScore])
+def score_batch(data: list[ClientData]):
+    """Churn et recommandations d'une liste de clients, les deux modèles dans ce processus."""
+    recommender, recommender_error = get_recommender()
+    if recommender is None:
+        raise HTTPException(status_code=503, detail=f"Service de recommandation indisponible : {recommender_error}")
+    return score_clients(data)
+
+@app.get("/health")
+def health():
+    """Le modèle est chargé et préchauffé à l'import : le service est prêt dès qu'il répond."""
+    return {"status": "ready", "model_version": registry.active.version}
+
+@app.get("/cache/stats")
+def cache_stats():
+    stats = prediction_cache.stats()
+    if shared_encoder is not None:
+        stats["features"] = shared_encoder.stats()
+    return stats
+
+@app.get("/models")
+def list_models():
+    return registry.describe()
+
+@app.post("/models/load", status_code=202)
+def load_model(request: ModelLoadRequest):
+    """Charge et préchauffe un artefact de CHURN_MODEL_DIR en arrière-plan, puis bascule dessus.
+
+    La version est publiée : les autres workers basculent dans les secondes qui suivent.
+    """
+    try:
+        path = resolve_request_path(request.path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    version = registry.publish(path)
+    return {"status": "loading", "path": path, "model_version": version}
+
+@app.post("/models/rollback")
+def rollback_model():
+    try:
+        serving_model = registry.publish_rollback()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "active", "model_version": serving_model.version}
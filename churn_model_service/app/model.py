@@ -1,72 +1,120 @@
-import joblib
-from app.utils import preprocess
+import os
 from app.schemas import ClientData, ChurnReason
-import pandas as pd
+from app.registry import ModelRegistry
+from app.cache import PredictionCache
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.compose import ColumnTransformer
 
 
-model = joblib.load("model.joblib")
+# Cache des prédictions (CHURN_CACHE_SIZE=0 pour le désactiver)
+prediction_cache = PredictionCache(
+    max_size=int(os.getenv("CHURN_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("CHURN_CACHE_TTL", "3600"))
+)
+
+# Registre des versions ; chemin, mode de chargement et préchauffage : voir app.loader
+registry = ModelRegistry(
+    history=int(os.getenv("CHURN_MODEL_HISTORY", "2")),
+    on_activate=prediction_cache.bind_version
+)
+# Workers uvicorn : tous suivent la version publiée par /models/load et /models/rollback
+sync_seconds = float(os.getenv("CHURN_MODEL_SYNC_SECONDS", "2"))
+if sync_seconds > 0:
+    registry.load_published()
+    registry.sync()
+    registry.watch(sync_seconds)
+else:
+    registry.load()
+
+HIGH_RISK_INDICATORS = {
+    "Contract": {"Month-to-month": "Contrat mensuel indique une faible fidélité"},
+    "tenure": lambda x: "Faible ancienneté (moins d'un an)" if float(x) < 12 else None,
+    "MonthlyCharges": lambda x: "Charges mensuelles élevées" if float(x) > 70 else None,
+    "InternetService": {"Fiber optic": "Service Internet fibre optique plus sujet au churn"},
+    "OnlineSecurity": {"No": "Absence de sécurité en ligne"},
+    "TechSupport": {"No": "Absence de support technique"},
+    "PaymentMethod": {"Electronic check": "Paiement par chèque électronique plus risqué"}
+}
+
+# Règles compilées une seule fois : feature -> fonction(valeur) -> message ou None
+RISK_RULES = {
+    feature: rule if callable(rule) else rule.get
+    for feature, rule in HIGH_RISK_INDICATORS.items()
+}
 
 def get_feature_impact(feature_name: str, feature_value: str, importance: float) -> str:
     """Détermine l'impact d'une feature sur le risque de churn."""
-    high_risk_indicators = {
-        "Contract": {"Month-to-month": "Contrat mensuel indique une faible fidélité"},
-        "tenure": lambda x: "Faible ancienneté (moins d'un an)" if float(x) < 12 else None,
-        "MonthlyCharges": lambda x: "Charges mensuelles élevées" if float(x) > 70 else None,
-        "InternetService": {"Fiber optic": "Service Internet fibre optique plus sujet au churn"},
-        "OnlineSecurity": {"No": "Absence de sécurité en ligne"},
-        "TechSupport": {"No": "Absence de support technique"},
-        "PaymentMethod": {"Electronic check": "Paiement par chèque électronique plus risqué"}
-    }
-
-    if feature_name in high_risk_indicators:
-        if callable(high_risk_indicators[feature_name]):
-            return high_risk_indicators[feature_name](feature_value) or "Impact neutre"
-        elif isinstance(high_risk_indicators[feature_name], dict):
-            return high_risk_indicators[feature_name].get(feature_value, "Impact neutre")
-    return "Impact neutre"
+    rule = RISK_RULES.get(feature_name)
+    if rule is None:
+        return "Impact neutre"
+    return rule(feature_value) or "Impact neutre"
 
-def predict_churn(data: ClientData):
-    # Utiliser les noms des colonnes attendus par le modèle (via alias)
-    input_dict = data.dict(by_alias=True)
-    input_df = pd.DataFrame([input_dict])
-
-    expected_columns = model.feature_names_in_
-    missing_cols = set(expected_columns) - set(input_df.columns)
-    if missing_cols:
-        raise ValueError(f"Colonnes manquantes : {missing_cols}")
-
-    # Prédiction
-    prediction_proba = model.predict_proba(input_df)[0][1]
-    
-    # Analyse des features importantes
-    feature_importance = dict(zip(model.feature_names_in_, model.named_steps['classifier'].feature_importances_))
-    
-    # Trier les features par importance
-    sorted_features = sorted(feature_importance.items(), key=lambda x: x[1], reverse=True)
-    
-    # Prendre les 5 features les plus importantes
-    top_reasons = []
-    for feature_name, importance in sorted_features[:5]:
-        if importance > 0.01:  # Seuil minimal d'importance
-            feature_value = str(input_df[feature_name].iloc[0])
+def get_risk_level(probability: float) -> str:
+    """Convertit une probabilité de churn en niveau de risque."""
+    return "Élevé" if probability > 0.7 else "Moyen" if probability > 0.3 else "Faible"
+
+def build_predictions(serving_model, records: list[dict]):
+    """Score des dicts aliasés et construit probabilité, niveau de risque et raisons."""
+    probabilities, contributions = serving_model.score(records)
+
+    # Contributions par client des colonnes brutes, triées en une seule passe
+    top_indices = np.argsort(-contributions, axis=1)[:, :5]
+
+    results = []
+    for row, prediction_proba in enumerate(probabilities):
+        top_reasons = []
+        for column in top_indices[row]:
+            importance = contributions[row, column]
+            if importance <= 0.01:  # Seuil minimal de contribution
+                break
+            feature_name = serving_model.raw_columns[column]
+            feature_value = str(records[row][feature_name])
             impact = get_feature_impact(feature_name, feature_value, importance)
-            
-            reason = ChurnReason(
+
+            top_reasons.append(ChurnReason(
                 feature=feature_name,
                 importance=float(importance),
                 value=feature_value,
                 impact=impact
-            )
-            top_reasons.append(reason)
-    
-    # Déterminer le niveau de risque
-    risk_level = "Élevé" if prediction_proba > 0.7 else "Moyen" if prediction_proba > 0.3 else "Faible"
-    
-    return {
-        "churn_probability": prediction_proba,
-        "reasons": top_reasons,
-        "risk_level": risk_level
-    }
+            ))
+
+        results.append({
+            "churn_probability": float(prediction_proba),
+            "reasons": top_reasons,
+            "risk_level": get_risk_level(prediction_proba),
+            "model_version": serving_model.version
+        })
+
+    return results
+
+def predict_churn_batch(clients: list[ClientData]):
+    """Prédit le churn d'une liste de clients avec un seul appel au modèle.
+
+    Les résultats sont renvoyés dans l'ordre des clients reçus ; les clients
+    déjà vus avec les mêmes features sont servis depuis le cache.
+    """
+    if not clients:
+        return []
+
+    # Une seule version de modèle pour tout le lot, même si une bascule a lieu entre-temps
+    serving_model = registry.active
+
+    # Noms de colonnes attendus par le modèle (via alias)
+    records = [client.dict(by_alias=True) for client in clients]
+
+    results = [None] * len(records)
+    keys = [None] * len(records)
+    if prediction_cache.enabled:
+        keys = [prediction_cache.make_key(record, serving_model.version) for record in records]
+        results = [prediction_cache.get(key) for key in keys]
+
+    # Seuls les clients absents du cache passent par le modèle, en un seul lot
+    missing = [row for row, result in enumerate(results) if result is None]
+    if missing:
+        for row, result in zip(missing, build_predictions(serving_model, [records[row] for row in missing])):
+            results[row] = result
+            prediction_cache.put(keys[row], result)
+
+    return results
+
+def predict_churn(data: ClientData):
+    return predict_churn_batch([data])[0]
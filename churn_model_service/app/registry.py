@@ -0,0 +1,194 @@
+"""Registre versionné des modèles de churn, avec remplacement à chaud.
+
+Un nouvel artefact est chargé et préchauffé dans un thread en arrière-plan
+pendant que la version active continue de servir ; la bascule est ensuite une
+simple affectation de référence sous verrou. Les requêtes en cours terminent
+avec le modèle qu'elles ont pris au départ. Les versions précédentes restent
+en mémoire (``CHURN_MODEL_HISTORY``) pour un retour arrière immédiat.
+
+Chaque worker uvicorn a son propre registre. Un chargement ou un retour
+arrière demandé à l'un d'eux est publié dans un marqueur
+(``.active_model.json`` dans ``CHURN_MODEL_DIR``) que tous les workers
+relisent toutes les ``CHURN_MODEL_SYNC_SECONDS`` secondes (2 par défaut,
+0 pour désactiver) : ils basculent sur la même version, depuis leur
+historique ou en la chargeant en arrière-plan. Un worker qui démarre charge
+directement la version publiée.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from app.loader import load_model, model_fingerprint, models_dir, resolve_model_path, resolve_request_path
+
+MARKER_NAME = ".active_model.json"
+
+
+def marker_path() -> str:
+    return os.path.join(models_dir(), MARKER_NAME)
+
+
+def read_marker() -> dict | None:
+    """Version publiée pour tous les workers ({"path", "version"}), ou None."""
+    try:
+        with open(marker_path(), encoding="utf-8") as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(marker, dict) or "path" not in marker or "version" not in marker:
+        return None
+    try:
+        # Mêmes règles que /models/load : un artefact .joblib de CHURN_MODEL_DIR
+        marker["path"] = resolve_request_path(marker["path"])
+    except ValueError:
+        return None
+    return marker
+
+
+def write_marker(path: str, version: str):
+    directory = models_dir()
+    fd, tmp_path = tempfile.mkstemp(prefix=".active_model-", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"path": path, "version": version, "published_at": time.time()}, f)
+    os.replace(tmp_path, marker_path())
+
+
+class ModelRegistry:
+    def __init__(self, history: int = 2, on_activate=None):
+        self.history = max(1, history)
+        self.on_activate = on_activate
+        self._versions = OrderedDict()  # version -> ServingModel, de la plus ancienne à la plus récente
+        self._active = None
+        self._lock = threading.Lock()
+        self.loads = {}  # chemin -> état du dernier chargement
+        self.paths = {}  # version -> chemin de l'artefact
+        self._synced = None  # dernier marqueur traité par ce worker
+        self._watcher = None
+
+    @property
+    def active(self):
+        return self._active
+
+    def activate(self, serving_model):
+        """Rend ``serving_model`` actif de façon atomique et conserve l'historique."""
+        with self._lock:
+            self._versions.pop(serving_model.version, None)
+            self._versions[serving_model.version] = serving_model
+            while len(self._versions) > self.history:
+                self._versions.popitem(last=False)
+            self._active = serving_model
+        if self.on_activate is not None:
+            self.on_activate(serving_model.version)
+        return serving_model
+
+    def load(self, path: str = None):
+        """Charge, préchauffe puis active un artefact (bloquant)."""
+        path = resolve_model_path(path)
+        self.loads[path] = {"status": "loading", "started_at": time.time()}
+        try:
+            serving_model = load_model(path)
+            self.paths[serving_model.version] = path
+            self.activate(serving_model)
+        except Exception as e:
+            self.loads[path] = {"status": "failed", "error": str(e)}
+            raise
+        self.loads[path] = {"status": "loaded", "version": serving_model.version}
+        return serving_model
+
+    def load_async(self, path: str = None) -> str:
+        """Lance ``load`` dans un thread ; la version active sert jusqu'à la bascule."""
+        path = resolve_model_path(path)
+        if self.loads.get(path, {}).get("status") == "loading":
+            return path
+
+        def run():
+            try:
+                self.load(path)
+            except Exception:
+                pass  # l'erreur est exposée par describe()
+
+        self.loads[path] = {"status": "loading", "started_at": time.time()}
+        threading.Thread(target=run, name="churn-model-loader", daemon=True).start()
+        return path
+
+    def rollback(self):
+        """Réactive la version précédant la version active."""
+        with self._lock:
+            versions = list(self._versions)
+            index = versions.index(self._active.version)
+            if index == 0:
+                raise ValueError("Aucune version précédente disponible")
+            previous = self._versions[versions[index - 1]]
+        return self.activate(previous)
+
+    def publish(self, path: str) -> str:
+        """Charge ``path`` ici et le publie pour les autres workers ; renvoie sa version."""
+        version = model_fingerprint(path)
+        write_marker(path, version)
+        self._synced = (path, version)
+        self.load_async(path)
+        return version
+
+    def publish_rollback(self):
+        """Retour arrière ici, puis publication de la version réactivée pour les autres workers."""
+        serving_model = self.rollback()
+        path = self.paths.get(serving_model.version)
+        if path is not None:
+            write_marker(path, serving_model.version)
+            self._synced = (path, serving_model.version)
+        return serving_model
+
+    def load_published(self):
+        """Chargement au démarrage : la version publiée si elle se charge, sinon ``CHURN_MODEL_PATH``."""
+        marker = read_marker()
+        if marker is not None:
+            try:
+                return self.load(marker["path"])
+            except Exception:
+                pass  # état visible dans describe()["loads"]
+        return self.load()
+
+    def sync(self):
+        """Aligne ce worker sur le marqueur publié (une seule tentative par publication)."""
+        marker = read_marker()
+        if marker is None:
+            return
+        key = (marker["path"], marker["version"])
+        if key == self._synced:
+            return
+        self._synced = key
+        if self._active is not None and self._active.version == marker["version"]:
+            return
+        with self._lock:
+            known = self._versions.get(marker["version"])
+        if known is not None:
+            self.activate(known)
+        else:
+            self.load_async(marker["path"])
+
+    def watch(self, interval: float):
+        """Relit le marqueur toutes les ``interval`` secondes dans un thread."""
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sync()
+                except Exception:
+                    pass  # marqueur illisible ou artefact absent : nouvel essai au prochain tour
+
+        self._watcher = threading.Thread(target=run, name="churn-model-sync", daemon=True)
+        self._watcher.start()
+
+    def describe(self) -> dict:
+        with self._lock:
+            return {
+                "active_version": self._active.version if self._active else None,
+                "versions": list(self._versions),
+                "published": read_marker(),
+                "loads": dict(self.loads),
+            }
@@ -30,4 +30,13 @@ class ChurnReason(BaseModel):
 class Prediction(BaseModel):
     churn_probability: float
     reasons: list[ChurnReason]
-    risk_level: str
\ No newline at end of file
+    risk_level: str
+    model_version: str
+
+class ModelLoadRequest(BaseModel):
+    # Nom de fichier (ou chemin) dans CHURN_MODEL_DIR ; vide = CHURN_MODEL_PATH
+    path: str | None = None
+
+class ClientScore(BaseModel):
+    churn: Prediction
+    recommendations: list[str]
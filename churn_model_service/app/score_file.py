@@ -0,0 +1,98 @@
+"""Scoring hors ligne de gros fichiers clients, sans passer par HTTP.
+
+Le CSV (schéma ``telco_churn.csv``, séparateur ``;``) est lu par blocs de
+taille fixe ; les blocs sont répartis sur un pool de processus qui chargent
+chacun le modèle une seule fois. Les résultats sont écrits dans l'ordre
+d'entrée au fur et à mesure, avec au plus ``2 x jobs`` blocs en vol : la
+mémoire reste bornée quelle que soit la taille du fichier.
+
+Usage (depuis la racine du service) :
+
+    python -m app.score_file clients.csv scores.csv [--chunk-size 20000]
+        [--jobs N] [--model model.joblib]
+
+Le fichier de sortie reprend les colonnes d'entrée et ajoute
+``churn_probability``, ``risk_level``, ``model_version`` et ``reasons`` (JSON).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+
+def init_worker(model_path: str = None):
+    """Charge le modèle une fois par processus (registre, mode mmap/compilé, préchauffage)."""
+    if model_path:
+        os.environ["CHURN_MODEL_PATH"] = model_path
+    # Le modèle choisi ici reste celui du fichier entier (pas de suivi de /models/load)
+    os.environ.setdefault("CHURN_MODEL_SYNC_SECONDS", "0")
+    # Un fichier est lu une seule fois : ni le cache de prédictions ni celui
+    # de l'encodeur partagé (json + sha256 par ligne) ne serviraient à rien
+    os.environ.setdefault("CHURN_CACHE_SIZE", "0")
+    os.environ.setdefault("TELCO_FEATURE_CACHE_SIZE", "0")
+    import app.model  # noqa: F401
+
+
+def score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    from app.model import build_predictions, registry
+
+    serving_model = registry.active
+    features = chunk[serving_model.raw_columns].copy()
+    features["TotalCharges"] = pd.to_numeric(features["TotalCharges"], errors="coerce").fillna(0)
+
+    predictions = build_predictions(serving_model, features.to_dict(orient="records"))
+    output = chunk.copy()
+    output["churn_probability"] = [p["churn_probability"] for p in predictions]
+    output["risk_level"] = [p["risk_level"] for p in predictions]
+    output["model_version"] = serving_model.version
+    output["reasons"] = [
+        json.dumps([reason.model_dump() for reason in p["reasons"]], ensure_ascii=False)
+        for p in predictions
+    ]
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--model", help="chemin du modèle (sinon CHURN_MODEL_PATH)")
+    parser.add_argument("--sep", default=";")
+    args = parser.parse_args()
+
+    reader = pd.read_csv(args.input, sep=args.sep, chunksize=args.chunk_size)
+    pending = deque()
+    rows = 0
+    header = True
+    start = time.perf_counter()
+
+    def write(result: pd.DataFrame):
+        nonlocal rows, header
+        result.to_csv(args.output, sep=args.sep, index=False, header=header, mode="w" if header else "a")
+        header = False
+        rows += len(result)
+        elapsed = time.perf_counter() - start
+        print(f"\r{rows} clients scorés ({rows / elapsed:.0f} clients/s)", end="", file=sys.stderr, flush=True)
+
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker, initargs=(args.model,)) as pool:
+        for chunk in reader:
+            pending.append(pool.submit(score_chunk, chunk))
+            # Contre-pression : on n'avance dans le fichier que si peu de blocs sont en vol
+            while len(pending) >= 2 * args.jobs:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+
+    elapsed = time.perf_counter() - start
+    print(f"\n{rows} clients scorés en {elapsed:.1f} s -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
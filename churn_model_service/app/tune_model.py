@@ -0,0 +1,206 @@
+"""Recherche parallèle de modèles et d'hyperparamètres pour le churn.
+
+Le prétraitement (one-hot + scaling) est ajusté une seule fois par pli de
+validation croisée ; les matrices obtenues sont écrites en ``.npy`` et ouvertes
+en ``mmap_mode='r'`` par les processus du pool, qui les partagent au lieu de
+refaire l'encodage pour chaque candidat. Chaque couple (candidat, pli) est une
+tâche du pool. Le classement final donne la précision et la latence
+d'inférence de chaque candidat.
+
+Usage (depuis la racine du service) :
+
+    python -m app.tune_model [--folds 5] [--jobs N] [--models rf,hgb]
+                             [--output leaderboard.csv] [--save model.joblib]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+# Candidats : clé -> (estimateur de base, grille d'hyperparamètres)
+CANDIDATES = {
+    "rf": (RandomForestClassifier(random_state=42, n_jobs=1), {
+        "n_estimators": [100, 200],
+        "max_depth": [None, 10, 20],
+        "min_samples_leaf": [1, 5],
+    }),
+    "et": (ExtraTreesClassifier(random_state=42, n_jobs=1), {
+        "n_estimators": [100, 200],
+        "max_depth": [None, 12],
+    }),
+    "hgb": (HistGradientBoostingClassifier(random_state=42), {
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [None, 6],
+    }),
+    "logreg": (LogisticRegression(max_iter=1000), {
+        "C": [0.1, 1.0, 10.0],
+    }),
+}
+
+# Seuls les modèles à base d'arbres sont explicables par app.explain / app.compiled
+SERVABLE = {"rf", "et"}
+
+LATENCY_RUNS = 50
+
+
+def load_dataset(path: str = "data/telco_churn.csv"):
+    df = pd.read_csv(path, sep=";")
+    df["Churn"] = df["Churn"].map({"Yes": 1, "No": 0})
+    df["TotalCharges"] = pd.to_numeric(df["TotalCharges"], errors="coerce")
+    df["TotalCharges"] = df["TotalCharges"].fillna(df["TotalCharges"].median())
+
+    X = df.drop("Churn", axis=1)
+    y = df["Churn"].to_numpy()
+    return X, y
+
+
+def make_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
+    categorical_cols = X.select_dtypes(include=["object"]).columns.tolist()
+    numeric_cols = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
+    return ColumnTransformer(
+        transformers=[
+            ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_cols),
+            ('num', StandardScaler(), numeric_cols)
+        ],
+        sparse_threshold=0.0
+    )
+
+
+def prepare_folds(X, y, n_folds: int, cache_dir: str) -> list[dict]:
+    """Ajuste le prétraitement une fois par pli et écrit les matrices en ``.npy``."""
+    folds = []
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42)
+    for fold, (train_idx, test_idx) in enumerate(splitter.split(X, y)):
+        preprocessor = make_preprocessor(X).fit(X.iloc[train_idx])
+        paths = {}
+        for name, array in (
+            ("X_train", preprocessor.transform(X.iloc[train_idx])),
+            ("X_test", preprocessor.transform(X.iloc[test_idx])),
+            ("y_train", y[train_idx]),
+            ("y_test", y[test_idx]),
+        ):
+            paths[name] = os.path.join(cache_dir, f"fold{fold}_{name}.npy")
+            np.save(paths[name], np.ascontiguousarray(array, dtype=np.float32 if name[0] == "X" else None))
+        folds.append(paths)
+    return folds
+
+
+def evaluate(candidate: int, model_key: str, params: dict, fold: int, paths: dict) -> dict:
+    """Ajuste un candidat sur un pli (exécuté dans un processus du pool)."""
+    data = {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+    estimator = clone(CANDIDATES[model_key][0]).set_params(**params)
+
+    start = time.perf_counter()
+    estimator.fit(data["X_train"], data["y_train"])
+    fit_seconds = time.perf_counter() - start
+
+    X_test = np.asarray(data["X_test"])
+    start = time.perf_counter()
+    probabilities = estimator.predict_proba(X_test)[:, 1]
+    batch_ms_per_row = (time.perf_counter() - start) / len(X_test) * 1000
+
+    single = X_test[:1]
+    timings = []
+    for _ in range(LATENCY_RUNS):
+        start = time.perf_counter()
+        estimator.predict_proba(single)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "candidate": candidate,
+        "model": model_key,
+        "params": params,
+        "fold": fold,
+        "accuracy": accuracy_score(data["y_test"], probabilities > 0.5),
+        "auc": roc_auc_score(data["y_test"], probabilities),
+        "fit_seconds": fit_seconds,
+        "batch_ms_per_row": batch_ms_per_row,
+        "single_ms": float(np.median(timings)) * 1000,
+    }
+
+
+def build_leaderboard(results: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(results)
+    df["params"] = df["params"].map(lambda p: ", ".join(f"{k}={v}" for k, v in sorted(p.items())))
+    leaderboard = df.groupby(["candidate", "model", "params"], as_index=False).agg(
+        accuracy=("accuracy", "mean"),
+        accuracy_std=("accuracy", "std"),
+        auc=("auc", "mean"),
+        fit_seconds=("fit_seconds", "mean"),
+        batch_ms_per_row=("batch_ms_per_row", "mean"),
+        single_ms=("single_ms", "median"),
+    )
+    return leaderboard.sort_values(["accuracy", "single_ms"], ascending=[False, True]).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data/telco_churn.csv")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--models", default=",".join(CANDIDATES), help="sous-ensemble de " + ",".join(CANDIDATES))
+    parser.add_argument("--output", default="leaderboard.csv")
+    parser.add_argument("--save", help="réentraîne le meilleur modèle servable et le sauvegarde ici")
+    args = parser.parse_args()
+
+    X, y = load_dataset(args.data)
+    model_keys = [key.strip() for key in args.models.split(",") if key.strip()]
+    tasks = [
+        (key, params)
+        for key in model_keys
+        for params in ParameterGrid(CANDIDATES[key][1])
+    ]
+
+    with tempfile.TemporaryDirectory(prefix="churn-folds-") as cache_dir:
+        folds = prepare_folds(X, y, args.folds, cache_dir)
+        print(f"{len(tasks)} candidats x {len(folds)} plis sur {args.jobs} processus")
+
+        results = []
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = [
+                pool.submit(evaluate, candidate, key, params, fold, paths)
+                for candidate, (key, params) in enumerate(tasks)
+                for fold, paths in enumerate(folds)
+            ]
+            for done, future in enumerate(as_completed(futures), start=1):
+                results.append(future.result())
+                print(f"\r{done}/{len(futures)} ajustements", end="", flush=True)
+        print(f"\nRecherche terminée en {time.perf_counter() - start:.1f} s")
+
+    leaderboard = build_leaderboard(results)
+    leaderboard.to_csv(args.output, index=False)
+    with pd.option_context("display.max_colwidth", 60, "display.width", 200):
+        print(leaderboard.to_string(float_format=lambda v: f"{v:.4f}"))
+    print(f"Classement sauvegardé dans {args.output}")
+
+    if args.save:
+        servable = leaderboard[leaderboard["model"].isin(SERVABLE)]
+        if servable.empty:
+            raise SystemExit("Aucun modèle servable (rf, et) dans la recherche")
+        best = servable.iloc[0]
+        params = tasks[best["candidate"]][1]
+        clf = Pipeline(steps=[
+            ('preprocessor', make_preprocessor(X)),
+            ('classifier', clone(CANDIDATES[best["model"]][0]).set_params(**params))
+        ])
+        clf.fit(X, y)
+        joblib.dump(clf, args.save)
+        print(f"Meilleur modèle servable ({best['model']} : {best['params']}) sauvegardé dans {args.save}")
+
+
+if __name__ == "__main__":
+    main()
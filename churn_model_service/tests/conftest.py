@@ -0,0 +1,50 @@
+# tests/conftest.py
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+# Les tests importent le package ``app`` comme le service (lancé depuis sa racine)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_clients(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Contract": rng.choice(["Month-to-month", "One year", "Two year"], n),
+        "InternetService": rng.choice(["DSL", "Fiber optic", "No"], n),
+        "tenure": rng.integers(0, 72, n),
+        "MonthlyCharges": rng.uniform(18, 120, n).round(2),
+    })
+
+
+@pytest.fixture(scope="session")
+def pipeline():
+    df = make_clients(400, seed=0)
+    y = ((df["Contract"] == "Month-to-month") & (df["MonthlyCharges"] > 70)).astype(int)
+    # Un peu de bruit pour avoir des arbres profonds et des feuilles non pures
+    y ^= np.random.default_rng(1).random(len(df)) < 0.1
+    preprocessor = ColumnTransformer(transformers=[
+        ("cat", OneHotEncoder(handle_unknown="ignore"), ["Contract", "InternetService"]),
+        ("num", StandardScaler(), ["tenure", "MonthlyCharges"]),
+    ])
+    model = Pipeline(steps=[
+        ("preprocessor", preprocessor),
+        ("classifier", RandomForestClassifier(n_estimators=20, min_samples_leaf=2, random_state=42)),
+    ])
+    return model.fit(df, y)
+
+
+@pytest.fixture(scope="session")
+def clients():
+    df = make_clients(200, seed=2)
+    # Catégories jamais vues à l'entraînement : encodées à zéro des deux côtés
+    df.loc[:9, "Contract"] = "Three year"
+    df.loc[5:14, "InternetService"] = "Satellite"
+    return df
@@ -0,0 +1,62 @@
+# tests/test_compiled.py
+"""Parité du mode compilé (``app.compiled``) avec le pipeline sklearn."""
+import numpy as np
+
+from app.compiled import CompiledModel, check_parity
+from app.explain import TreeExplainer
+
+
+def expected(pipeline, df):
+    probabilities = pipeline.predict_proba(df)[:, 1]
+    contributions = TreeExplainer(pipeline).explain(pipeline.named_steps["preprocessor"].transform(df))
+    return probabilities, contributions
+
+
+def test_compiled_matches_pipeline(pipeline, clients):
+    compiled = CompiledModel.from_pipeline(pipeline)
+    probabilities, contributions = compiled.score(compiled.encode(clients.to_dict(orient="records")))
+    expected_probabilities, expected_contributions = expected(pipeline, clients)
+
+    np.testing.assert_allclose(probabilities, expected_probabilities, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(contributions, expected_contributions, rtol=0, atol=1e-12)
+    assert compiled.predict_proba(clients.to_dict(orient="records")).tolist() == probabilities.tolist()
+
+
+def test_unknown_categories_match_pipeline(pipeline, clients):
+    unknown = clients.iloc[:15]
+    report = check_parity(pipeline, CompiledModel.from_pipeline(pipeline), unknown)
+    assert report["max_proba_diff"] <= 1e-12
+    assert report["max_contribution_diff"] <= 1e-12
+
+
+def test_float32_thresholds_keep_decisions(pipeline):
+    compiled = CompiledModel.from_pipeline(pipeline)
+    compact = compiled.astype(np.float32)
+    internal = compiled.left != np.arange(len(compiled.left))
+    threshold = compiled.threshold[internal]
+    rounded = compact.threshold[internal]
+
+    # Entrées float32 autour de chaque seuil : même branche qu'avec le seuil float64
+    near = threshold.astype(np.float32)
+    for x in (near, np.nextafter(near, np.float32(np.inf)), np.nextafter(near, np.float32(-np.inf))):
+        np.testing.assert_array_equal(x <= rounded, x.astype(np.float64) <= threshold)
+
+
+def test_float32_model_matches_pipeline(pipeline, clients):
+    compact = CompiledModel.from_pipeline(pipeline).astype(np.float32)
+    probabilities, contributions = compact.score(compact.encode(clients.to_dict(orient="records")))
+    expected_probabilities, expected_contributions = expected(pipeline, clients)
+
+    np.testing.assert_allclose(probabilities, expected_probabilities, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(contributions, expected_contributions, rtol=0, atol=1e-5)
+
+
+def test_explainer_score_matches_pipeline(pipeline, clients):
+    # Chemin par défaut du service : probabilités et contributions d'un seul parcours
+    transformed = pipeline.named_steps["preprocessor"].transform(clients)
+    explainer = TreeExplainer(pipeline)
+    probabilities, contributions = explainer.score(transformed)
+
+    np.testing.assert_allclose(probabilities, pipeline.predict_proba(clients)[:, 1], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(contributions.sum(axis=1) + explainer.bias, probabilities, rtol=0, atol=1e-12)
+    assert explainer.explain(transformed).tolist() == contributions.tolist()
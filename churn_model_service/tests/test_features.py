@@ -0,0 +1,41 @@
+# tests/test_features.py
+"""Parité de l'encodage partagé ``telco_features`` avec le ``ColumnTransformer`` du pipeline."""
+import numpy as np
+
+from app.compiled import CompiledModel
+from app.features import shared_encoder
+from app.loader import ServingModel
+from telco_features import FeatureEncoder  # importable via app.features
+
+
+def test_shared_view_matches_preprocessor(pipeline, clients):
+    encoder = FeatureEncoder(max_size=1000)
+    view = encoder.register(pipeline.named_steps["preprocessor"])
+    records = clients.to_dict(orient="records")
+
+    expected = pipeline.named_steps["preprocessor"].transform(clients)
+    transformed = view.transform(encoder.encode(records))
+    np.testing.assert_allclose(transformed, np.asarray(expected, dtype=np.float32), rtol=0, atol=0)
+
+    # Deuxième passage servi par le cache : mêmes entrées
+    again = view.transform(encoder.encode(records))
+    assert encoder.stats()["hits"] == len(records)
+    np.testing.assert_array_equal(again, transformed)
+
+
+def test_compiled_spec_matches_preprocessor(pipeline, clients):
+    encoder = FeatureEncoder(max_size=0)
+    view = encoder.register(CompiledModel.from_pipeline(pipeline).feature_spec())
+    transformed = view.transform(encoder.encode(clients.to_dict(orient="records")))
+    expected = pipeline.named_steps["preprocessor"].transform(clients)
+    np.testing.assert_allclose(transformed, np.asarray(expected, dtype=np.float32), rtol=0, atol=0)
+
+
+def test_serving_path_matches_pipeline(pipeline, clients):
+    # Chemin de service par défaut : encodeur partagé, puis forêt
+    assert shared_encoder is not None
+    serving_model = ServingModel("test", pipeline=pipeline)
+    assert serving_model.features is not None
+
+    probabilities, _ = serving_model.score(clients.to_dict(orient="records"))
+    np.testing.assert_allclose(probabilities, pipeline.predict_proba(clients)[:, 1], rtol=0, atol=1e-12)
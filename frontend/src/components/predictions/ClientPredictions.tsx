@@ -84,6 +84,8 @@ interface PredictionResult {
   sentiment: {
     sentiment: string;
     probabilities: number[];
+    classes?: string[];
+    tier?: string;
   };
   recommendation: {
     recommendations: string[];
@@ -122,6 +124,8 @@ interface PredictionResponse {
       sentiment?: {
         sentiment: string;
         probabilities: number[];
+        classes?: string[];
+        tier?: string;
       };
     };
   }>;
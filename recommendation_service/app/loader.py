@@ -0,0 +1,37 @@
+"""Chargement du pipeline de recommandation : chemin configurable, client de préchauffage.
+
+- ``RECOMMENDER_MODEL_PATH`` : chemin du pipeline
+  (par défaut ``model/recommender_pipeline.pkl`` à la racine du service).
+
+Les noeuds des arbres sklearn sont recopiés en mémoire au désérialisation, un
+``mmap_mode`` ne les partagerait donc pas. Pour partager la forêt entre workers,
+le service se lance avec gunicorn en ``preload_app`` (voir ``gunicorn.conf.py``) :
+le pipeline est chargé une fois dans le processus maître puis hérité par fork,
+en copie sur écriture.
+"""
+import os
+
+import joblib
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Client type utilisé pour la prédiction de préchauffage
+WARMUP_CLIENT = {
+    "gender": "Female", "SeniorCitizen": 0, "Partner": "Yes", "Dependents": "No",
+    "tenure": 1, "PhoneService": "No", "MultipleLines": "No phone service",
+    "InternetService": "DSL", "OnlineSecurity": "No", "OnlineBackup": "Yes",
+    "DeviceProtection": "No", "TechSupport": "No", "StreamingTV": "No",
+    "StreamingMovies": "No", "Contract": "Month-to-month", "PaperlessBilling": "Yes",
+    "PaymentMethod": "Electronic check", "MonthlyCharges": 29.85, "TotalCharges": 29.85
+}
+
+
+def resolve_model_path(path: str = None) -> str:
+    path = path or os.getenv("RECOMMENDER_MODEL_PATH", "model/recommender_pipeline.pkl")
+    if not os.path.isabs(path):
+        path = os.path.join(SERVICE_DIR, path)
+    return path
+
+
+def load_model(path: str = None):
+    return joblib.load(resolve_model_path(path))
@@ -1,10 +1,27 @@
-from fastapi import FastAPI
-from app.schema import ClientData, RecommendationResult
-from app.model import recommend_actions
+from fastapi import FastAPI, Query
+from app.schema import ClientData, RankedRecommendationResult, RecommendationResult
+from app.model import rank_offers_batch, recommend_actions, recommend_actions_batch
 
 app = FastAPI(title="Recommendation Microservice")
 
 @app.post("/recommend", response_model=RecommendationResult)
 def generate_recommendations(data: ClientData):
     recommendations = recommend_actions(data.dict())
-    return RecommendationResult(recommendations=recommendations)
\ No newline at end of file
+    return RecommendationResult(recommendations=recommendations)
+
+@app.post("/recommend/batch", response_model=list[RecommendationResult])
+def generate_recommendations_batch(data: list[ClientData]):
+    """Recommandations d'une liste de clients en un seul passage du modèle (ordre conservé)."""
+    results = recommend_actions_batch([client.dict() for client in data])
+    return [RecommendationResult(recommendations=recommendations) for recommendations in results]
+
+@app.post("/recommend/ranked", response_model=list[RankedRecommendationResult])
+def generate_ranked_recommendations(data: list[ClientData], top_k: int = Query(3, ge=1)):
+    """Top-k des offres par client avec leur score, en un seul ``predict_proba`` pour le lot."""
+    results = rank_offers_batch([client.dict() for client in data], top_k)
+    return [RankedRecommendationResult(recommendations=ranked) for ranked in results]
+
+@app.get("/health")
+def health():
+    """Le modèle est chargé et préchauffé à l'import : le service est prêt dès qu'il répond."""
+    return {"status": "ready"}
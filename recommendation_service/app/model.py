@@ -1,28 +1,119 @@
-import joblib
+import numpy as np
 import pandas as pd
+from app.features import register, shared_encoder
+from app.loader import WARMUP_CLIENT, load_model
+from app.offers import OFFERS
+from app.rules import RuleEngine
 
-model = joblib.load("model/recommender_pipeline.pkl")
+model = load_model()
 
-labels = [
-    "Proposer 1 mois gratuit sur le support technique",
-    "Offrir une réduction sur Online Backup",
-    "Proposer un essai gratuit pour Streaming TV"
+# Les sorties du modèle suivent l'ordre du catalogue utilisé à l'entraînement
+labels = [offer.label for offer in OFFERS]
+
+classifier = model.named_steps['classifier']
+# Forêt native multi-sortie, ou MultiOutputClassifier (une forêt par offre)
+n_outputs = classifier.n_outputs_ if hasattr(classifier, 'n_outputs_') else len(classifier.estimators_)
+if n_outputs != len(OFFERS):
+    raise ValueError(
+        f"Le modèle prédit {n_outputs} offres mais le catalogue en contient {len(OFFERS)} : réentraîner le modèle"
+    )
+
+# Offres déterministes évaluées par règles ; le modèle ne sert qu'aux offres apprises
+rule_engine = RuleEngine(OFFERS)
+
+# Colonnes catégorielles du préprocesseur, résolues une seule fois au chargement
+categorical_columns = [
+    col
+    for name, transformer, columns in model.named_steps['preprocessor'].transformers_
+    if name == 'cat'
+    for col in columns
 ]
 
-def recommend_actions(client_data: dict):
-    df = pd.DataFrame([client_data])
+# Vue de l'encodage partagé telco_features, ou None (prétraitement du pipeline)
+features = register(model.named_steps['preprocessor'])
+
+def prepare_frame(clients: list[dict]) -> pd.DataFrame:
+    """Construit le DataFrame d'entrée du pipeline pour un lot de clients."""
+    df = pd.DataFrame(clients)
 
-    # Accéder au transformateur (pipeline) pour identifier les colonnes catégorielles
-    column_transformer = model.named_steps['preprocessor']  # adapte le nom si différent
-    for name, transformer, columns in column_transformer.transformers_:
-        if name == 'cat':  # ou autre nom que tu as donné
-            for col in columns:
-                if col in df.columns:
-                    df[col] = df[col].astype(str)
+    present = [col for col in categorical_columns if col in df.columns]
+    df[present] = df[present].astype(str)
 
     # Remplace les valeurs manquantes
     df.fillna('missing', inplace=True)
+    return df
+
+def transform_clients(clients: list[dict]):
+    """Matrice d'entrée du classifieur pour un lot de clients."""
+    if features is not None:
+        return features.transform(shared_encoder.encode(clients))
+    return model.named_steps['preprocessor'].transform(prepare_frame(clients))
+
+def recommend_actions_batch(clients: list[dict]):
+    """Recommandations d'un lot de clients.
+
+    Les offres à règles sont évaluées directement ; ``model.predict`` n'est
+    appelé (une seule fois pour le lot) que si le catalogue contient des
+    offres apprises.
+    """
+    if not clients:
+        return []
+
+    decisions = np.zeros((len(clients), len(OFFERS)), dtype=bool)
+    decisions[:, rule_engine.rule_indices] = rule_engine.evaluate(clients)
+
+    if rule_engine.learned_indices:
+        predictions = np.asarray(classifier.predict(transform_clients(clients)))
+        decisions[:, rule_engine.learned_indices] = predictions[:, rule_engine.learned_indices] == 1
+
+    return [
+        [label for decided, label in zip(row, labels) if decided]
+        for row in decisions
+    ]
+
+def positive_scores(clients: list[dict]) -> np.ndarray:
+    """Probabilité d'éligibilité de chaque offre (clients x offres), en un seul ``predict_proba``."""
+    probabilities = classifier.predict_proba(transform_clients(clients))
+    # Forêt native : classes_ par sortie ; MultiOutputClassifier : une forêt par offre
+    classes = classifier.classes_ if hasattr(classifier, 'n_outputs_') else [e.classes_ for e in classifier.estimators_]
+
+    scores = np.zeros((len(clients), len(probabilities)))
+    for j, (proba, output_classes) in enumerate(zip(probabilities, classes)):
+        positive = np.flatnonzero(output_classes == 1)
+        if positive.size:
+            scores[:, j] = proba[:, positive[0]]
+    return scores
+
+def rank_offers_batch(clients: list[dict], top_k: int = 3):
+    """Top-k des offres de chaque client, triées par score décroissant.
+
+    Le score est la probabilité donnée par le modèle ; une offre à règles dont
+    les conditions ne sont pas remplies est exclue (score nul).
+    """
+    if not clients:
+        return []
+
+    scores = positive_scores(clients)
+    scores[:, rule_engine.rule_indices] *= rule_engine.evaluate(clients)
+
+    # Tri vectorisé ; à score égal, l'ordre du catalogue est conservé
+    top_k = min(top_k, len(OFFERS))
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :top_k]
+    top_scores = np.take_along_axis(scores, order, axis=1)
+
+    return [
+        [
+            {"code": OFFERS[j].code, "label": OFFERS[j].label, "score": float(score)}
+            for j, score in zip(row_order, row_scores) if score > 0
+        ]
+        for row_order, row_scores in zip(order, top_scores)
+    ]
+
+def recommend_actions(client_data: dict):
+    return recommend_actions_batch([client_data])[0]
+
 
-    # Prédiction
-    predictions = model.predict(df)[0]
-    return [label for pred, label in zip(predictions, labels) if pred == 1]
+# Préchauffage avant que le service ne réponde à sa première requête : les
+# offres du catalogue sont décidées par règles, seul le classement passe par la forêt
+recommend_actions(WARMUP_CLIENT)
+rank_offers_batch([WARMUP_CLIENT])
@@ -0,0 +1,70 @@
+"""Catalogue déclaratif des offres, partagé par l'entraînement et le service.
+
+Chaque offre décrit sa colonne cible (``code``), le message renvoyé au client
+(``label``) et ses règles d'éligibilité : une suite de conditions
+``(colonne, opérateur, valeur)`` toutes requises. Les règles s'évaluent en une
+seule passe vectorisée sur tout un DataFrame ; ajouter une offre revient à
+ajouter une entrée à ``OFFERS`` puis à réentraîner.
+
+Une offre ``learned=False`` est entièrement décidée par ses règles : le service
+l'évalue directement (voir ``app.rules``) sans passer par le modèle. Seules les
+offres ``learned=True`` sont prédites par la forêt.
+"""
+import operator
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda values, allowed: np.isin(values, list(allowed)),
+    "not in": lambda values, allowed: ~np.isin(values, list(allowed)),
+}
+
+
+@dataclass(frozen=True)
+class Offer:
+    code: str
+    label: str
+    conditions: tuple = ()
+    learned: bool = False
+
+    def eligible(self, df: pd.DataFrame) -> np.ndarray:
+        """Masque booléen des clients éligibles (toutes les conditions vraies)."""
+        mask = np.ones(len(df), dtype=bool)
+        for column, op, value in self.conditions:
+            mask &= np.asarray(OPERATORS[op](df[column].to_numpy(), value), dtype=bool)
+        return mask
+
+
+OFFERS = [
+    Offer(
+        code="Offer_TechSupport_FreeMonth",
+        label="Proposer 1 mois gratuit sur le support technique",
+        conditions=(("TechSupport", "==", "No"), ("InternetService", "!=", "No")),
+    ),
+    Offer(
+        code="Offer_OnlineBackup_Discount",
+        label="Offrir une réduction sur Online Backup",
+        conditions=(("OnlineBackup", "==", "No"), ("InternetService", "!=", "No")),
+    ),
+    Offer(
+        code="Offer_StreamingTV_FreeTrial",
+        label="Proposer un essai gratuit pour Streaming TV",
+        conditions=(("StreamingTV", "==", "No"), ("InternetService", "!=", "No")),
+    ),
+]
+
+
+def offer_targets(df: pd.DataFrame, offers: list[Offer] = OFFERS) -> pd.DataFrame:
+    """Colonnes cibles 0/1 de toutes les offres, calculées de façon vectorisée."""
+    return pd.DataFrame(
+        {offer.code: offer.eligible(df).astype(np.int64) for offer in offers},
+        index=df.index
+    )
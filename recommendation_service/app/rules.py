@@ -0,0 +1,34 @@
+"""Moteur de règles compilé pour les offres déterministes du catalogue.
+
+Les conditions des offres ``learned=False`` sont compilées une fois en
+fonctions NumPy ; un lot de clients est évalué colonne par colonne, sans
+DataFrame ni modèle.
+"""
+import numpy as np
+
+from app.offers import OPERATORS, Offer
+
+
+class RuleEngine:
+    def __init__(self, offers: list[Offer]):
+        self.offers = offers
+        # Indices (dans le catalogue) des offres décidées par les règles seules
+        self.rule_indices = [i for i, offer in enumerate(offers) if not offer.learned]
+        self.learned_indices = [i for i, offer in enumerate(offers) if offer.learned]
+        self._compiled = [
+            [(column, OPERATORS[op], value) for column, op, value in offers[i].conditions]
+            for i in self.rule_indices
+        ]
+        self.columns = sorted({column for rules in self._compiled for column, _, _ in rules})
+
+    def evaluate(self, clients: list[dict]) -> np.ndarray:
+        """Matrice booléenne (clients x offres à règles) d'éligibilité."""
+        values = {
+            column: np.array([client[column] for client in clients], dtype=object)
+            for column in self.columns
+        }
+        decisions = np.ones((len(clients), len(self._compiled)), dtype=bool)
+        for j, rules in enumerate(self._compiled):
+            for column, op, value in rules:
+                decisions[:, j] &= np.asarray(op(values[column], value), dtype=bool)
+        return decisions
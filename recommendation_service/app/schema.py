@@ -23,3 +23,11 @@ class ClientData(BaseModel):
 
 class RecommendationResult(BaseModel):
     recommendations: list[str]
+
+class RankedOffer(BaseModel):
+    code: str
+    label: str
+    score: float
+
+class RankedRecommendationResult(BaseModel):
+    recommendations: list[RankedOffer]
@@ -0,0 +1,11 @@
+# Lancement : gunicorn app.main:app -c gunicorn.conf.py
+import multiprocessing
+import os
+
+bind = os.getenv("RECOMMENDER_BIND", "0.0.0.0:8002")
+workers = int(os.getenv("RECOMMENDER_WORKERS", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Le pipeline est chargé (et préchauffé) une seule fois dans le maître, puis
+# partagé en copie sur écriture par tous les workers.
+preload_app = True
@@ -1,3 +1,8 @@
+import argparse
+import os
+import time
+
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.multioutput import MultiOutputClassifier
@@ -6,35 +11,23 @@ from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.pipeline import Pipeline
 import joblib
 
+from app.offers import OFFERS, offer_targets
+
+parser = argparse.ArgumentParser(description="Entraînement du pipeline de recommandation")
+parser.add_argument("--native", action="store_true",
+                    help="une seule forêt multi-sortie native au lieu de MultiOutputClassifier (une forêt par offre)")
+parser.add_argument("--n-jobs", type=int, default=-1, help="processeurs utilisés pour l'entraînement")
+parser.add_argument("--output", default="model/recommender_pipeline.pkl")
+args = parser.parse_args()
+
 # Charger les données
 df = pd.read_csv("training_data.csv", sep=';', encoding='utf-8')
 
-# Génération des colonnes cibles (exemple selon ton code)
-df["Offer_TechSupport_FreeMonth"] = df.apply(
-    lambda row: 1 if row["TechSupport"] == "No" and row["InternetService"] != "No" else 0,
-    axis=1
-)
-df["Offer_OnlineBackup_Discount"] = df.apply(
-    lambda row: 1 if row["OnlineBackup"] == "No" and row["InternetService"] != "No" else 0,
-    axis=1
-)
-df["Offer_StreamingTV_FreeTrial"] = df.apply(
-    lambda row: 1 if row["StreamingTV"] == "No" and row["InternetService"] != "No" else 0,
-    axis=1
-)
+# Génération des colonnes cibles à partir du catalogue d'offres (règles vectorisées)
+y = offer_targets(df, OFFERS)
 
 # Séparation des features et des cibles
-X = df.drop(columns=[
-    "Offer_TechSupport_FreeMonth",
-    "Offer_OnlineBackup_Discount",
-    "Offer_StreamingTV_FreeTrial",
-    "Churn"  # si non utilisé
-])
-y = df[[
-    "Offer_TechSupport_FreeMonth",
-    "Offer_OnlineBackup_Discount",
-    "Offer_StreamingTV_FreeTrial"
-]]
+X = df.drop(columns=["Churn"])  # si non utilisé
 
 # Détection des colonnes
 categorical_cols = X.select_dtypes(include=["object"]).columns.tolist()
@@ -48,16 +41,62 @@ preprocessor = ColumnTransformer(
     ]
 )
 
+# Une forêt native multi-sortie partage ses arbres entre toutes les offres ;
+# MultiOutputClassifier entraîne et évalue une forêt complète par offre.
+if args.native:
+    classifier = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=args.n_jobs)
+else:
+    classifier = MultiOutputClassifier(
+        RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=args.n_jobs)
+    )
+
 # Pipeline complet avec multi-output
 clf = Pipeline(steps=[
     ('preprocessor', preprocessor),
-    ('classifier', MultiOutputClassifier(RandomForestClassifier(n_estimators=100, random_state=42)))
+    ('classifier', classifier)
 ])
 
 # Entraînement
+start = time.perf_counter()
 clf.fit(X, y)
+print(f"Entraînement terminé en {time.perf_counter() - start:.1f} s")
+
+# En service, une prédiction ne gagne rien au parallélisme des threads
+for forest in [classifier] if args.native else classifier.estimators_:
+    forest.n_jobs = None
+
+# Rapport de parité et de latence par rapport au pipeline actuellement sauvegardé
+if os.path.exists(args.output):
+    reference = joblib.load(args.output)
+
+    def prepare(frame):
+        # Même préparation que le service (colonnes catégorielles en texte)
+        frame = frame.copy()
+        frame[categorical_cols] = frame[categorical_cols].astype(str)
+        return frame.fillna('missing')
+
+    X_serving = prepare(X)
+    expected = np.asarray(reference.predict(X_serving))
+    predicted = np.asarray(clf.predict(X_serving))
+
+    def latency_ms(model, frame, runs):
+        start = time.perf_counter()
+        for _ in range(runs):
+            model.predict(frame)
+        return (time.perf_counter() - start) / runs * 1000
+
+    single = X_serving.iloc[[0]]
+    batch = X_serving.iloc[:1000]
+    print("Parité avec le pipeline actuel :")
+    for i, offer in enumerate(OFFERS):
+        print(f"  {offer.code:<30} accord {np.mean(expected[:, i] == predicted[:, i]):.4%}")
+    print(f"  toutes offres identiques : {np.mean((expected == predicted).all(axis=1)):.4%}")
+    print(f"Latence 1 client   : actuel {latency_ms(reference, single, 50):.2f} ms, "
+          f"nouveau {latency_ms(clf, single, 50):.2f} ms")
+    print(f"Latence 1000 clients : actuel {latency_ms(reference, batch, 5):.2f} ms, "
+          f"nouveau {latency_ms(clf, batch, 5):.2f} ms")
 
 # Sauvegarde du pipeline complet (prétraitement + modèle)
-joblib.dump(clf, "model/recommender_pipeline.pkl")
+joblib.dump(clf, args.output)
 
 print("✅ Modèle multi-output entraîné et pipeline sauvegardé avec succès.")
@@ -0,0 +1,203 @@
+# app/backends.py
+"""Backends d'inférence CPU du modèle de sentiment.
+
+``SENTIMENT_BACKEND`` choisit le moteur :
+
+- ``torch`` : modèle PyTorch fp32 d'origine (par défaut) ;
+- ``int8`` : quantification dynamique int8 des couches ``Linear`` ;
+- ``onnx`` : graphe ONNX exécuté par onnxruntime (optimisations de graphe
+  complètes). Le fichier ``SENTIMENT_ONNX_PATH`` (par défaut
+  ``models/sentiment.onnx``) est exporté au premier chargement s'il manque ;
+  un graphe quantifié int8 peut être produit à l'avance :
+
+      python -m app.backends export [--output models/sentiment-int8.onnx] [--quantize]
+
+Le modèle est lu depuis ``SENTIMENT_MODEL_DIR`` s'il est défini (voir
+``app.startup``) ; ce répertoire se prépare une fois, avec accès réseau :
+
+      python -m app.backends download [--output models/bert-sentiment]
+
+Chaque niveau de modèle (voir ``app.tiers``) a son propre répertoire local et
+son propre graphe ONNX (``models/sentiment-<niveau>.onnx`` hors ``accurate``) ;
+``--tier fast`` prépare ceux du niveau rapide.
+
+Le backend ``onnx`` n'importe pas torch : un worker ne charge que
+onnxruntime et le tokenizer.
+
+Tous les backends reçoivent des entrées déjà paddées (tableaux NumPy ``int64``)
+et renvoient les logits sous forme de tableau NumPy ; la
+comparaison de parité et de latence se fait avec ``python -m app.compare_backends``.
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from app.tiers import REFERENCE_TIER, TIERS, default_tier, model_dir as tier_model_dir
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODEL_NAME = TIERS[REFERENCE_TIER]["model"]
+
+
+def resolve_model_source(tier: str = None) -> tuple[str, bool]:
+    """(répertoire local ou nom du hub, lecture hors ligne seulement) du niveau ``tier``."""
+    tier = tier or default_tier()
+    model_dir = tier_model_dir(tier)
+    if model_dir:
+        if not os.path.isabs(model_dir):
+            model_dir = os.path.join(SERVICE_DIR, model_dir)
+        return model_dir, True
+    return TIERS[tier]["model"], os.getenv("SENTIMENT_OFFLINE", "0") == "1"
+
+
+def resolve_onnx_path(path: str = None, tier: str = None) -> str:
+    tier = tier or default_tier()
+    if tier == REFERENCE_TIER:
+        path = path or os.getenv("SENTIMENT_ONNX_PATH", "models/sentiment.onnx")
+    else:
+        path = path or f"models/sentiment-{tier}.onnx"
+    if not os.path.isabs(path):
+        path = os.path.join(SERVICE_DIR, path)
+    return path
+
+
+class TorchBackend:
+    def __init__(self, model_name: str, quantize: bool = False, threads: tuple = (None, None), offline: bool = False):
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        intra, inter = threads
+        if intra:
+            torch.set_num_threads(intra)
+        if inter:
+            try:
+                torch.set_num_interop_threads(inter)
+            except RuntimeError:
+                pass  # déjà fixé : possible une seule fois par processus
+
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, local_files_only=offline)
+        model.eval()
+        if quantize:
+            # Poids int8 et activations quantifiées à la volée : seules les Linear changent
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+
+    def logits(self, inputs) -> np.ndarray:
+        import torch
+
+        with torch.inference_mode():
+            tensors = {name: torch.from_numpy(array) for name, array in inputs.items()}
+            return self.model(**tensors).logits.float().numpy()
+
+
+class OnnxBackend:
+    def __init__(self, path: str, threads: tuple = (None, None)):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        intra, inter = threads
+        if intra:
+            options.intra_op_num_threads = intra
+        if inter:
+            options.inter_op_num_threads = inter
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def logits(self, inputs) -> np.ndarray:
+        feed = {name: np.asarray(inputs[name], dtype=np.int64) for name in self.input_names}
+        return self.session.run(["logits"], feed)[0]
+
+
+def export_onnx(model_name: str, path: str, quantize: bool = False, offline: bool = False):
+    """Exporte le modèle en ONNX (axes lot et séquence dynamiques), de façon atomique."""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=offline)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, local_files_only=offline)
+    model.eval()
+
+    sample = tokenizer(["je veux résilier", "merci"], return_tensors="pt", padding=True)
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".sentiment-", suffix=".onnx", dir=directory)
+    os.close(fd)
+    try:
+        with torch.inference_mode():
+            torch.onnx.export(
+                model, tuple(sample[name] for name in input_names), tmp_path,
+                input_names=input_names, output_names=["logits"],
+                dynamic_axes=dynamic_axes, opset_version=17, dynamo=False,
+            )
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantized_path = tmp_path + ".int8"
+            quantize_dynamic(tmp_path, quantized_path, weight_type=QuantType.QInt8)
+            os.replace(quantized_path, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def download(model_name: str, output: str):
+    """Copie locale du modèle et du tokenizer, pour démarrer ensuite sans réseau."""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output)
+    AutoModelForSequenceClassification.from_pretrained(model_name).save_pretrained(output)
+
+
+def load_backend(name: str = None, model_name: str = None, threads: tuple = (None, None), offline: bool = None,
+                 tier: str = None):
+    name = name or os.getenv("SENTIMENT_BACKEND", "torch")
+    if model_name is None or offline is None:
+        source, source_offline = resolve_model_source(tier)
+        model_name = model_name or source
+        offline = source_offline if offline is None else offline
+    if name == "torch":
+        return TorchBackend(model_name, threads=threads, offline=offline)
+    if name == "int8":
+        return TorchBackend(model_name, quantize=True, threads=threads, offline=offline)
+    if name == "onnx":
+        path = resolve_onnx_path(tier=tier)
+        if not os.path.exists(path):
+            export_onnx(model_name, path, offline=offline)
+        return OnnxBackend(path, threads=threads)
+    raise ValueError(f"Backend de sentiment inconnu : {name} (torch, int8, onnx)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "download"])
+    parser.add_argument("--tier", choices=list(TIERS), default=REFERENCE_TIER)
+    parser.add_argument("--model-name", help="nom du hub (par défaut celui du niveau)")
+    parser.add_argument("--output", help="chemin du graphe (sinon SENTIMENT_ONNX_PATH) ou du répertoire local")
+    parser.add_argument("--quantize", action="store_true", help="quantification dynamique int8 du graphe")
+    args = parser.parse_args()
+    model_name = args.model_name or TIERS[args.tier]["model"]
+
+    if args.command == "download":
+        default_dir = "models/bert-sentiment" if args.tier == REFERENCE_TIER else f"models/{args.tier}-sentiment"
+        output = args.output or tier_model_dir(args.tier) or default_dir
+        if not os.path.isabs(output):
+            output = os.path.join(SERVICE_DIR, output)
+        download(model_name, output)
+        print(f"Modèle et tokenizer copiés dans {output} (SENTIMENT_{args.tier.upper()}_MODEL_DIR={output})")
+        return
+
+    path = resolve_onnx_path(args.output, tier=args.tier)
+    export_onnx(model_name, path, quantize=args.quantize)
+    print(f"Graphe ONNX exporté dans {path} ({os.path.getsize(path) / 1e6:.1f} Mo)")
+
+
+if __name__ == "__main__":
+    main()
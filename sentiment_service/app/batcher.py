@@ -0,0 +1,110 @@
+# app/batcher.py
+"""Micro-batching asyncio des requêtes de sentiment.
+
+Les textes reçus sont mis en file ; une tâche de fond les regroupe pendant au
+plus ``SENTIMENT_BATCH_WAIT_MS`` millisecondes ou jusqu'à
+``SENTIMENT_BATCH_SIZE`` textes, lance une seule passe avant (dans un thread,
+pour ne pas bloquer la boucle d'événements) puis rend à chaque appelant son
+propre résultat. Pendant qu'un lot tourne, le suivant se remplit ; avec un
+pool de processus (``app.pool``), jusqu'à ``max_in_flight`` lots tournent en
+même temps.
+"""
+import asyncio
+import os
+
+
+class MicroBatcher:
+    def __init__(self, predict_batch, max_batch_size: int = None, max_wait_ms: float = None, max_in_flight: int = 1):
+        self.predict_batch = predict_batch
+        self.max_in_flight = max_in_flight
+        self.max_batch_size = max_batch_size or int(os.getenv("SENTIMENT_BATCH_SIZE", "16"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv("SENTIMENT_BATCH_WAIT_MS", "5"))) / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._task = None
+        self._slots = None
+        self._in_flight = set()
+
+    def start(self):
+        """Démarre la tâche de regroupement (à appeler dans la boucle du serveur)."""
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, text: str):
+        """Résultat de ``text``, calculé dans le prochain lot."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # Un lot n'est constitué que lorsqu'une passe avant peut le prendre
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.get_running_loop().create_task(self._process(batch))
+            # Référence gardée jusqu'à la fin de la passe (sinon la tâche peut être collectée)
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _process(self, batch):
+        try:
+            # Appelants partis entre-temps (client déconnecté) : rien à calculer
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                return
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    None, self.predict_batch, [text for text, _ in batch]
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_in_flight": self.max_in_flight,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
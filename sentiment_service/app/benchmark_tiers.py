@@ -0,0 +1,99 @@
+# app/benchmark_tiers.py
+"""Débit, latence et accord des niveaux de modèle de sentiment (voir ``app.tiers``).
+
+Chaque niveau est mesuré dans son propre processus (voir
+``app.compare_backends.measure``) sur un échantillon local annoté. Les
+niveaux n'ont pas le même nombre de classes : l'accord avec le modèle de
+référence (``accurate``) et la justesse par rapport aux annotations se
+mesurent sur la polarité (négatif / neutre / positif).
+
+Usage (depuis la racine du service) :
+
+    python -m app.benchmark_tiers [--tiers accurate,fast] [--backend torch]
+        [--sample messages.csv] [--runs 50] [--batch-size 16] [--min-agreement 0.8]
+
+``--sample`` : CSV avec les colonnes ``text`` et ``label`` (label du service
+ou polarité). Le script échoue (code 1) si un niveau s'accorde avec la
+référence moins souvent que ``--min-agreement``.
+"""
+import argparse
+import csv
+import multiprocessing
+import sys
+
+from app.compare_backends import measure
+from app.tiers import REFERENCE_TIER, TIERS, polarity
+
+LABELED_SAMPLE = [
+    ("je veux résilier", "négatif"),
+    ("Merci beaucoup, le service est parfait.", "positif"),
+    ("Ma connexion coupe tous les soirs depuis une semaine, c'est inacceptable.", "négatif"),
+    ("Pouvez-vous m'envoyer ma dernière facture ?", "neutre"),
+    ("Le technicien n'est jamais venu et personne ne répond au téléphone. "
+     "Je paie pour un service que je n'ai pas, je vais aller voir la concurrence.", "négatif"),
+    ("Très satisfait de la nouvelle offre fibre.", "positif"),
+    ("Bof, ça marche mais le débit est souvent en dessous de ce qui était promis.", "neutre"),
+    ("Service client injoignable, facture erronée deux mois de suite.", "négatif"),
+    ("Je souhaite changer l'adresse de facturation de mon contrat.", "neutre"),
+    ("Installation rapide et conseiller très aimable, je recommande.", "positif"),
+    ("Encore une hausse de prix sans prévenir, c'est la dernière fois.", "négatif"),
+    ("La nouvelle box fonctionne bien, rien à signaler.", "positif"),
+]
+
+
+def load_sample(path: str) -> list[tuple[str, str]]:
+    with open(path, encoding="utf-8", newline="") as f:
+        return [(row["text"], polarity(row["label"])) for row in csv.DictReader(f) if row["text"].strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tiers", default=",".join(TIERS))
+    parser.add_argument("--backend", default="torch", help="backend commun aux niveaux (voir app.backends)")
+    parser.add_argument("--sample", help="CSV annoté (colonnes text et label)")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--min-agreement", type=float, default=0.8, help="accord minimal de polarité avec la référence")
+    args = parser.parse_args()
+
+    sample = load_sample(args.sample) if args.sample else LABELED_SAMPLE
+    texts = [text for text, _ in sample]
+    gold = [label for _, label in sample]
+
+    tiers = [name.strip() for name in args.tiers.split(",") if name.strip()]
+    for name in tiers:
+        if name not in TIERS:
+            parser.error(f"niveau inconnu : {name} ({', '.join(TIERS)})")
+    if REFERENCE_TIER not in tiers:
+        tiers.insert(0, REFERENCE_TIER)  # référence d'accord
+
+    context = multiprocessing.get_context("spawn")
+    reports = {}
+    for tier in tiers:
+        print(f"Mesure du niveau {tier} ({TIERS[tier]['model']})...", file=sys.stderr)
+        with context.Pool(1) as pool:
+            reports[tier] = pool.apply(measure, (args.backend, texts, args.runs, args.batch_size, tier))
+
+    reference = [polarity(label) for label in reports[REFERENCE_TIER]["labels"]]
+    failed = False
+    print(f"{'niveau':<9} {'chargement':>10} {'mémoire':>9} {'p50':>9} {'p95':>9} {'débit':>10}"
+          f" {'accord réf.':>11} {'justesse':>9} {'accélération':>12}")
+    for tier, report in reports.items():
+        predicted = [polarity(label) for label in report["labels"]]
+        agreement = sum(p == r for p, r in zip(predicted, reference)) / len(texts)
+        accuracy = sum(p == g for p, g in zip(predicted, gold)) / len(texts)
+        throughput = 1000 / report["batch_ms_per_text"]
+        speedup = reports[REFERENCE_TIER]["single_p50_ms"] / report["single_p50_ms"]
+        print(f"{tier:<9} {report['load_seconds']:9.1f}s {report['model_mb']:7.0f}Mo"
+              f" {report['single_p50_ms']:7.1f}ms {report['single_p95_ms']:7.1f}ms"
+              f" {throughput:6.1f} t/s {agreement:11.1%} {accuracy:9.1%} {speedup:11.2f}x")
+        if agreement < args.min_agreement:
+            print(f"ACCORD INSUFFISANT pour {tier}")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
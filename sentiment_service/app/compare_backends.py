@@ -0,0 +1,129 @@
+# app/compare_backends.py
+"""Parité, latence et mémoire des backends de sentiment (voir ``app.backends``).
+
+Chaque backend est chargé dans son propre processus, pour mesurer sa
+mémoire résidente sans être faussé par les autres. Les probabilités des cinq
+classes sont comparées à celles du modèle fp32 (``torch``).
+
+Usage (depuis la racine du service) :
+
+    python -m app.compare_backends [--backends torch,int8,onnx] [--texts messages.txt]
+        [--runs 50] [--batch-size 16] [--max-diff 0.05] [--min-agreement 0.95]
+
+Le script échoue (code 1) si un backend s'écarte de fp32 au-delà des seuils.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+SAMPLE_TEXTS = [
+    "je veux résilier",
+    "Merci beaucoup, le service est parfait.",
+    "Ma connexion coupe tous les soirs depuis une semaine, c'est inacceptable.",
+    "Pouvez-vous m'envoyer ma dernière facture ?",
+    "Le technicien n'est jamais venu et personne ne répond au téléphone. "
+    "Je paie pour un service que je n'ai pas, je vais aller voir la concurrence.",
+    "Très satisfait de la nouvelle offre fibre.",
+    "Bof, ça marche mais le débit est souvent en dessous de ce qui était promis.",
+    "Service client injoignable, facture erronée deux mois de suite.",
+]
+
+
+def rss_mb() -> float:
+    # ru_maxrss est en Ko sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(backend: str, texts: list[str], runs: int, batch_size: int, tier: str = None) -> dict:
+    """Exécuté dans un processus dédié au backend (et au niveau de modèle, voir ``app.tiers``)."""
+    # Chaque mesure doit payer sa passe avant
+    os.environ["SENTIMENT_RESULT_CACHE_SIZE"] = "0"
+    baseline_mb = rss_mb()
+    start = time.perf_counter()
+    from app.model import SentimentAnalyzer
+
+    analyzer = SentimentAnalyzer(backend=backend, tier=tier)
+    load_seconds = time.perf_counter() - start
+    loaded_mb = rss_mb()
+
+    results = analyzer.predict_batch(texts)
+
+    single = []
+    for i in range(runs):
+        t0 = time.perf_counter()
+        analyzer.predict(texts[i % len(texts)])
+        single.append(time.perf_counter() - t0)
+
+    batch = (texts * (batch_size // len(texts) + 1))[:batch_size]
+    batched = []
+    for _ in range(max(1, runs // 5)):
+        t0 = time.perf_counter()
+        analyzer.predict_batch(batch)
+        batched.append(time.perf_counter() - t0)
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "model_mb": loaded_mb - baseline_mb,
+        "peak_rss_mb": rss_mb(),
+        "single_p50_ms": float(np.percentile(single, 50)) * 1000,
+        "single_p95_ms": float(np.percentile(single, 95)) * 1000,
+        "batch_ms_per_text": float(np.median(batched)) * 1000 / batch_size,
+        "probabilities": [result["probabilities"] for result in results],
+        "labels": [result["label"] for result in results],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,int8,onnx")
+    parser.add_argument("--texts", help="fichier texte, un message par ligne")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-diff", type=float, default=0.05, help="écart maximal de probabilité toléré")
+    parser.add_argument("--min-agreement", type=float, default=0.95, help="accord minimal des labels avec fp32")
+    args = parser.parse_args()
+
+    texts = SAMPLE_TEXTS
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    if "torch" not in backends:
+        backends.insert(0, "torch")  # référence de parité
+
+    context = multiprocessing.get_context("spawn")
+    reports = {}
+    for backend in backends:
+        print(f"Mesure du backend {backend}...", file=sys.stderr)
+        with context.Pool(1) as pool:
+            reports[backend] = pool.apply(measure, (backend, texts, args.runs, args.batch_size))
+
+    reference = np.asarray(reports["torch"]["probabilities"])
+    failed = False
+    print(f"{'backend':<8} {'chargement':>10} {'mémoire':>9} {'p50':>9} {'p95':>9} {'lot/texte':>10}"
+          f" {'écart max':>10} {'accord':>7} {'accélération':>12}")
+    for backend, report in reports.items():
+        probabilities = np.asarray(report["probabilities"])
+        max_diff = float(np.abs(probabilities - reference).max())
+        agreement = float((probabilities.argmax(axis=1) == reference.argmax(axis=1)).mean())
+        speedup = reports["torch"]["single_p50_ms"] / report["single_p50_ms"]
+        print(f"{backend:<8} {report['load_seconds']:9.1f}s {report['model_mb']:7.0f}Mo"
+              f" {report['single_p50_ms']:7.1f}ms {report['single_p95_ms']:7.1f}ms"
+              f" {report['batch_ms_per_text']:8.1f}ms {max_diff:10.4f} {agreement:7.1%} {speedup:11.2f}x")
+        if max_diff > args.max_diff or agreement < args.min_agreement:
+            print(f"PARITÉ NON RESPECTÉE pour {backend}")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,102 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from app.model import SentimentAnalyzer
+from app.batcher import MicroBatcher
+from app.startup import ModelLoader, pool_processes
+from app.tiers import enabled_tiers
+
+# Le modèle est chargé en arrière-plan : le port est ouvert tout de suite (voir app.startup)
+loader = ModelLoader()
+# Les requêtes /predict concurrentes d'un même niveau partagent une même passe avant ;
+# avec un pool de processus, un lot par worker peut tourner en parallèle
+batchers = {
+    tier: MicroBatcher(lambda texts, tier=tier: loader.predict_batch(texts, tier), max_in_flight=max(1, pool_processes()))
+    for tier in enabled_tiers()
+}
 
-app = FastAPI()
-analyzer = SentimentAnalyzer()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loader.start()
+    for batcher in batchers.values():
+        batcher.start()
+    yield
+    for batcher in batchers.values():
+        await batcher.stop()
+    loader.close()
+
+app = FastAPI(lifespan=lifespan)
 
 class TextRequest(BaseModel):
     text: str
+    # accurate ou fast (voir app.tiers) ; niveau par défaut du déploiement si absent
+    tier: str | None = None
+
+def require_model(tier: str = None):
+    if not loader.ready:
+        raise HTTPException(status_code=503, detail=f"Modèle de sentiment non prêt ({loader.status})")
+    try:
+        return loader.get(tier)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Niveau de sentiment non chargé : {tier} ({', '.join(loader.analyzers)})")
 
 @app.post("/predict")
-def predict_sentiment(request: TextRequest):
+async def predict_sentiment(request: TextRequest):
+    """Sentiment d'un texte : ``label``, ``probabilities``, ``classes`` et ``tier``.
+
+    ``classes[i]`` est le label de ``probabilities[i]`` ; les classes vont
+    toujours du plus négatif au plus positif (5 pour ``accurate``, 3 pour
+    ``fast``, voir app.tiers). ``tier`` est le niveau qui a calculé le résultat.
+    """
+    analyzer = require_model(request.tier)
     try:
-        result = analyzer.predict(request.text)
-        return result
+        result = await batchers[analyzer.tier].submit(request.text)
+        return {**result, "tier": analyzer.tier}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/predict/batch")
+async def predict_sentiment_batch(requests: list[TextRequest], tier: str | None = Query(None)):
+    """Sentiment d'une liste de textes (ordre conservé), répartis en groupes de longueurs voisines.
+
+    ``tier`` s'applique aux textes qui ne précisent pas leur propre niveau.
+    """
+    by_tier = {}
+    for i, request in enumerate(requests):
+        analyzer = require_model(request.tier or tier)
+        by_tier.setdefault(analyzer.tier, []).append(i)
+
+    results = [None] * len(requests)
+    try:
+        for name, indices in by_tier.items():
+            texts = [requests[i].text for i in indices]
+            for i, result in zip(indices, await run_in_threadpool(loader.predict_batch, texts, name)):
+                results[i] = {**result, "tier": name}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return results
+
+@app.get("/health")
+def health():
+    """Prêt (200) une fois le modèle chargé et préchauffé ; 503 pendant le chargement, après un échec
+    ou quand un worker du pool est mort (``degraded``)."""
+    return JSONResponse(loader.describe(), status_code=200 if loader.healthy else 503)
+
+@app.get("/batch/stats")
+def batch_stats():
+    return {tier: batcher.stats() for tier, batcher in batchers.items()}
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Taux de succès des caches de résultats et de tokenisation, par niveau."""
+    require_model()
+    return {
+        tier: {
+            "results": analyzer.result_cache.stats(),
+            "tokens": analyzer.token_cache.stats(),
+        }
+        for tier, analyzer in loader.analyzers.items()
+    }
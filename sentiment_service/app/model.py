@@ -1,32 +1,128 @@
 # app/model.py
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
-import torch.nn.functional as F
+import os
+import numpy as np
+from transformers import AutoConfig, AutoTokenizer
+from app.backends import load_backend, resolve_model_source, resolve_onnx_path
+from app.result_cache import ResultCache
+from app.startup import thread_settings
+from app.tiers import REFERENCE_TIER, default_tier, logit_labels, output_order
+from app.tokens import TokenCache, length_buckets, pad, split_windows
+
+def softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
 
 class SentimentAnalyzer:
-    def __init__(self):
-        self.model_name = "nlptown/bert-base-multilingual-uncased-sentiment"
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+    def __init__(self, backend=None, tier=None):
+        # accurate (BERT 5 classes) ou fast (DistilBERT 3 classes) : voir app.tiers
+        self.tier = tier or default_tier()
+        # Répertoire local (SENTIMENT_MODEL_DIR) ou nom du hub : voir app.startup
+        self.model_name, offline = resolve_model_source(self.tier)
+        # Probabilités rendues du plus négatif au plus positif, d'après l'ordre des logits du modèle
+        labels = logit_labels(self.tier, AutoConfig.from_pretrained(self.model_name, local_files_only=offline).id2label)
+        self.order = output_order(labels)
+        self.labels = [labels[i] for i in self.order]
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, local_files_only=offline)
+        # torch (fp32), int8 ou onnx : voir app.backends
+        backend = backend or os.getenv("SENTIMENT_BACKEND", "torch")
+        self.backend = load_backend(backend, self.model_name, threads=thread_settings(), offline=offline,
+                                    tier=self.tier)
+        # Mode texte long : fenêtres glissantes au lieu de la troncature à la taille maximale
+        self.long_text = os.getenv("SENTIMENT_LONG_TEXT", "0") == "1"
+        self.max_length = self.tokenizer.model_max_length if self.tokenizer.model_max_length < 100000 else 512
+        self.window_overlap = int(os.getenv("SENTIMENT_WINDOW_OVERLAP", "128"))
+        self.max_windows = int(os.getenv("SENTIMENT_MAX_WINDOWS", "8"))
+        self.token_cache = TokenCache(self.tokenizer, truncation=not self.long_text)
+        # Identité du modèle servi : un autre modèle ou backend n'hérite pas des résultats en cache
+        model_id = f"{self.tier}:{os.path.basename(self.model_name.rstrip('/'))}:{backend}"
+        if backend == "onnx":
+            model_id += f":{os.path.basename(resolve_onnx_path(tier=self.tier))}"
+        if self.long_text:
+            model_id += f":windows-{self.window_overlap}-{self.max_windows}"
+        # Un fichier SQLite par niveau : chacun est élagué à sa propre taille
+        cache_path = os.getenv("SENTIMENT_RESULT_CACHE_PATH")
+        if cache_path and self.tier != REFERENCE_TIER:
+            root, ext = os.path.splitext(cache_path)
+            cache_path = f"{root}-{self.tier}{ext}"
+        self.result_cache = ResultCache(model_id, path=cache_path)
+        self.max_bucket_items = int(os.getenv("SENTIMENT_BATCH_SIZE", "16"))
+        self.max_bucket_tokens = int(os.getenv("SENTIMENT_BUCKET_TOKENS", "8192"))
 
     def predict(self, text):
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            probs = F.softmax(outputs.logits, dim=1)
-            predicted_class = torch.argmax(probs, dim=1).item()
-            sentiment = self.map_sentiment(predicted_class)
-            return {
-                "label": sentiment,
-                "probabilities": probs.tolist()[0]
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts, infer=None):
+        """Sentiment d'un lot, dans l'ordre des textes reçus.
+
+        Les textes déjà vus (au texte normalisé près) sont servis par le cache
+        de résultats ; les autres ne sont calculés qu'une fois chacun, par
+        ``infer`` (``self.infer`` ou le pool de processus, voir ``app.pool``).
+        """
+        if not texts:
+            return []
+        keys = [self.result_cache.make_key(text) for text in texts]
+        results = self.result_cache.get_many(keys)
+
+        missing = {}
+        for key, text, result in zip(keys, texts, results):
+            if result is None:
+                missing.setdefault(key, text)
+        if missing:
+            computed = dict(zip(missing, (infer or self.infer)(list(missing.values()))))
+            self.result_cache.put_many(computed)
+            results = [result if result is not None else computed[key] for key, result in zip(keys, results)]
+        return results
+
+    def infer(self, texts):
+        """Une passe avant par groupe de textes de longueurs voisines.
+
+        Chaque groupe n'est paddé qu'à son plus long texte. En mode texte long,
+        toutes les fenêtres du lot passent dans ces mêmes groupes ; les
+        probabilités d'un texte sont la moyenne de celles de ses fenêtres,
+        pondérée par le nombre de tokens que chacune ajoute aux précédentes.
+        """
+        encodings = self.token_cache.encode(list(texts))
+        owners = list(range(len(texts)))
+        if self.long_text:
+            windows, owners, weights = [], [], []
+            for owner, encoding in enumerate(encodings):
+                text_windows, text_weights = split_windows(
+                    encoding, self.max_length, self.window_overlap, self.max_windows
+                )
+                windows.extend(text_windows)
+                weights.extend(text_weights)
+                owners.extend([owner] * len(text_windows))
+            encodings = windows
+        lengths = [len(encoding["input_ids"]) for encoding in encodings]
+
+        window_probs = np.empty((len(encodings), 0))
+        for bucket in length_buckets(lengths, self.max_bucket_items, self.max_bucket_tokens):
+            inputs = pad([encodings[i] for i in bucket], self.tokenizer.pad_token_id)
+            bucket_probs = softmax(self.backend.logits(inputs))
+            if window_probs.shape[1] == 0:
+                window_probs = np.empty((len(encodings), bucket_probs.shape[1]), dtype=bucket_probs.dtype)
+            window_probs[bucket] = bucket_probs
+
+        if self.long_text:
+            weights = np.asarray(weights, dtype=np.float64)[:, None]
+            probs = np.zeros((len(texts), window_probs.shape[1]))
+            np.add.at(probs, owners, window_probs * weights)
+            probs /= np.bincount(owners, weights=weights[:, 0], minlength=len(texts))[:, None]
+        else:
+            probs = window_probs
+        probs = probs[:, self.order]
+
+        predicted_classes = probs.argmax(axis=1).tolist()
+        return [
+            {
+                "label": self.map_sentiment(predicted_class),
+                "probabilities": probabilities,
+                "classes": self.labels
             }
+            for predicted_class, probabilities in zip(predicted_classes, probs.tolist())
+        ]
 
     def map_sentiment(self, class_id):
-        mapping = {
-            0: "très négatif",
-            1: "négatif",
-            2: "neutre",
-            3: "positif",
-            4: "très positif"
-        }
-        return mapping.get(class_id, "inconnu")
+        if 0 <= class_id < len(self.labels):
+            return self.labels[class_id]
+        return "inconnu"
@@ -0,0 +1,242 @@
+# app/pool.py
+"""Pool de processus d'inférence partageant une seule copie des poids.
+
+Avec ``SENTIMENT_POOL_PROCESSES=N``, le processus uvicorn charge le modèle
+une fois puis crée ``N`` processus par ``fork`` : les poids sont hérités en
+copie sur écriture et jamais modifiés, la mémoire du modèle n'est donc payée
+qu'une fois par noeud. Les handlers déposent des lots dans une file ; un
+thread lit les réponses et réveille les appelants.
+
+Contraintes :
+
+- le parent ne fait aucune passe avant avant le fork (le pool de threads
+  OpenMP de torch ne survit pas au fork) : chaque worker se préchauffe ;
+- les sessions onnxruntime ne supportent pas le fork : le mode pool n'accepte
+  que les backends ``torch`` et ``int8`` ;
+- les coeurs sont répartis entre les workers du pool (voir ``app.startup``).
+
+Chaque worker a son propre canal (``Pipe``) : un worker qui meurt (OOM,
+segfault d'une bibliothèque native) ne laisse aucun verrou de file partagée
+bloquer les autres. Sa mort est détectée par son ``sentinel`` : ses lots en
+cours échouent aussitôt au lieu d'attendre ``SENTIMENT_POOL_TIMEOUT``, les
+lots suivants vont aux workers restants et ``describe`` le signale (``/health``
+répond alors 503 pour que l'instance soit redémarrée). Les workers ne sont
+pas recréés : le parent a déjà des threads et ne peut plus forker sans risque.
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+from app.startup import WARMUP_TEXTS, available_cpus
+
+
+def worker_main(analyzer, connection, intra_threads: int):
+    """Boucle d'un worker : calcule les lots reçus avec le modèle hérité du parent."""
+    import torch
+
+    torch.set_num_threads(intra_threads)
+    try:
+        analyzer.infer(WARMUP_TEXTS)
+    except Exception as e:
+        connection.send(("failed", os.getpid(), repr(e)))
+        return
+    connection.send(("ready", os.getpid(), None))
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        job_id, texts = job
+        try:
+            connection.send((job_id, analyzer.infer(texts), None))
+        except Exception as e:
+            connection.send((job_id, None, str(e)))
+
+
+class InferencePool:
+    def __init__(self, analyzer, processes: int, chunk_size: int = None, timeout: float = None):
+        if not hasattr(analyzer.backend, "model"):
+            raise ValueError("Le mode pool n'accepte que les backends torch et int8 (onnxruntime ne supporte pas le fork)")
+        self.processes = processes
+        self.chunk_size = chunk_size or analyzer.max_bucket_items
+        self.timeout = timeout if timeout is not None else float(os.getenv("SENTIMENT_POOL_TIMEOUT", "60"))
+        intra_threads = int(os.getenv("SENTIMENT_INTRA_OP_THREADS", max(1, available_cpus() // processes)))
+
+        context = multiprocessing.get_context("fork")
+        self._ids = itertools.count()
+        self._pending = {}  # job_id -> (future, indice du worker)
+        self._lock = threading.Lock()
+        self._closing = False
+        self.pids = []
+        self.dead = []  # {"pid", "exitcode"} des workers morts
+
+        self._workers = []
+        self._connections = []
+        self._send_locks = []
+        for i in range(processes):
+            parent_end, child_end = context.Pipe()
+            worker = context.Process(
+                target=worker_main, args=(analyzer, child_end, intra_threads),
+                name=f"sentiment-worker-{i}", daemon=True,
+            )
+            worker.start()
+            child_end.close()
+            self._workers.append(worker)
+            self._connections.append(parent_end)
+            self._send_locks.append(threading.Lock())
+        self._alive = set(range(processes))
+        try:
+            self._wait_warmup(self.timeout * 10)
+        except Exception:
+            self._terminate()
+            raise
+
+        self._reader = threading.Thread(target=self._read_responses, name="sentiment-pool-reader", daemon=True)
+        self._reader.start()
+
+    def _wait_warmup(self, timeout: float):
+        """Attend que chaque worker soit préchauffé ; échoue dès qu'un worker échoue ou meurt."""
+        deadline = time.monotonic() + timeout
+        waiting = set(range(self.processes))
+        pids = {}
+        while waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                names = ", ".join(self._workers[i].name for i in sorted(waiting))
+                raise TimeoutError(f"Préchauffage des workers d'inférence non terminé après {timeout:.0f}s ({names})")
+            for i in list(waiting):
+                connection, worker = self._connections[i], self._workers[i]
+                if connection.poll():
+                    try:
+                        status, pid, error = connection.recv()
+                    except EOFError:
+                        worker.join(timeout=5)
+                        raise RuntimeError(f"{worker.name} arrêté pendant le préchauffage (code {worker.exitcode})")
+                    if status != "ready":
+                        raise RuntimeError(f"Échec du préchauffage de {worker.name} : {error}")
+                    pids[i] = pid
+                    waiting.discard(i)
+                elif not worker.is_alive():
+                    raise RuntimeError(f"{worker.name} arrêté pendant le préchauffage (code {worker.exitcode})")
+            if waiting:
+                wait([self._connections[i] for i in waiting] + [self._workers[i].sentinel for i in waiting],
+                     timeout=min(remaining, 1.0))
+        self.pids = [pids[i] for i in range(self.processes)]
+
+    def _read_responses(self):
+        while not self._closing:
+            with self._lock:
+                alive = sorted(self._alive)
+            if not alive:
+                break
+            objects = {self._connections[i]: i for i in alive}
+            objects.update({self._workers[i].sentinel: i for i in alive})
+            for ready in wait(list(objects), timeout=1.0):
+                i = objects[ready]
+                if i not in self._alive:
+                    continue
+                # Réponses déjà envoyées d'abord, y compris par un worker qui vient de mourir
+                try:
+                    while self._connections[i].poll():
+                        self._deliver(self._connections[i].recv())
+                except (EOFError, OSError):
+                    pass
+                if not self._workers[i].is_alive():
+                    self._worker_died(i)
+
+    def _deliver(self, message):
+        job_id, results, error = message
+        with self._lock:
+            future, _ = self._pending.pop(job_id, (None, None))
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(results)
+
+    def _worker_died(self, index: int):
+        """Retire le worker du pool et fait échouer ses lots en cours."""
+        worker = self._workers[index]
+        worker.join(timeout=1)
+        with self._lock:
+            self._alive.discard(index)
+            self.dead.append({"pid": worker.pid, "exitcode": worker.exitcode})
+            lost = [job_id for job_id, (_, owner) in self._pending.items() if owner == index]
+            futures = [self._pending.pop(job_id)[0] for job_id in lost]
+        error = RuntimeError(f"{worker.name} (pid {worker.pid}) arrêté (code {worker.exitcode}) pendant l'inférence")
+        for future in futures:
+            future.set_exception(error)
+
+    def submit(self, texts: list[str]) -> Future:
+        """Confie le lot au worker vivant qui a le moins de lots en cours."""
+        future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            if not self._alive:
+                raise RuntimeError("Aucun worker d'inférence en vie")
+            loads = {i: 0 for i in self._alive}
+            for _, owner in self._pending.values():
+                if owner in loads:
+                    loads[owner] += 1
+            index = min(loads, key=lambda i: (loads[i], i))
+            self._pending[job_id] = (future, index)
+        try:
+            with self._send_locks[index]:
+                self._connections[index].send((job_id, texts))
+        except OSError:
+            # Worker mort entre-temps : le lecteur s'en apercevra aussi
+            with self._lock:
+                self._pending.pop(job_id, None)
+            future.set_exception(RuntimeError(f"{self._workers[index].name} arrêté"))
+        return future
+
+    def infer(self, texts: list[str]) -> list:
+        """Même contrat que ``SentimentAnalyzer.infer`` ; un gros lot est réparti sur les workers."""
+        futures = [
+            self.submit(texts[start:start + self.chunk_size])
+            for start in range(0, len(texts), self.chunk_size)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result(timeout=self.timeout))
+        return results
+
+    @property
+    def healthy(self) -> bool:
+        """Tous les workers du pool sont en vie."""
+        return len(self._alive) == self.processes
+
+    def _terminate(self):
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join(timeout=5)
+
+    def close(self):
+        self._closing = True
+        for i in sorted(self._alive):
+            try:
+                with self._send_locks[i]:
+                    self._connections[i].send(None)
+            except OSError:
+                pass
+        for worker in self._workers:
+            worker.join(timeout=5)
+        self._terminate()
+        self._reader.join(timeout=5)
+
+    def describe(self) -> dict:
+        return {
+            "processes": self.processes,
+            "pids": self.pids,
+            "alive": sum(worker.is_alive() for worker in self._workers),
+            "dead": list(self.dead),
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,138 @@
+# app/result_cache.py
+"""Cache des résultats de sentiment par hash du texte normalisé.
+
+Les messages clients sont souvent des modèles identiques à la casse, aux
+espaces ou aux accents près (« je veux résilier », « Je veux resilier  ») :
+la clé est le hash du texte normalisé, combiné à l'identité du modèle pour
+qu'un autre modèle ou backend ne serve jamais d'anciens résultats.
+
+- ``SENTIMENT_RESULT_CACHE_SIZE`` : nombre d'entrées (0 pour désactiver) ;
+- ``SENTIMENT_RESULT_CACHE_PATH`` : fichier SQLite optionnel ; le cache y est
+  écrit au fil de l'eau et rechargé au démarrage.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+WHITESPACE = re.compile(r"\s+")
+
+# À incrémenter quand la forme des résultats change : les anciennes entrées persistées sont ignorées
+RESULT_FORMAT = 2
+
+
+def normalize(text: str) -> str:
+    """Texte sans accents, en minuscules, espaces réduits."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return WHITESPACE.sub(" ", stripped.casefold()).strip()
+
+
+class ResultCache:
+    def __init__(self, model_id: str, max_size: int = None, path: str = None):
+        self.model_id = model_id
+        self.max_size = max_size if max_size is not None else int(os.getenv("SENTIMENT_RESULT_CACHE_SIZE", "10000"))
+        self.path = path if path is not None else os.getenv("SENTIMENT_RESULT_CACHE_PATH")
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if self.path and self.enabled:
+            self._open()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def make_key(self, text: str) -> str:
+        return hashlib.sha256(f"{RESULT_FORMAT}|{self.model_id}|{normalize(text)}".encode("utf-8")).hexdigest()
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT, seq INTEGER)"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(results)")]
+        if "seq" not in columns:
+            # Ancien fichier ordonné par horodatage : l'ordre est conservé, les numéros continuent au-delà
+            self._db.execute("ALTER TABLE results RENAME COLUMN updated_at TO seq")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_seq ON results (seq)")
+        # Seules les entrées les plus récentes sont gardées, sur disque comme en mémoire
+        self._db.execute(
+            "DELETE FROM results WHERE key NOT IN "
+            "(SELECT key FROM results ORDER BY seq DESC LIMIT ?)", (self.max_size,)
+        )
+        self._db.commit()
+        rows = self._db.execute("SELECT key, value FROM results ORDER BY seq").fetchall()
+        for key, value in rows:
+            self._entries[key] = json.loads(value)
+
+    def get_many(self, keys: list[str]) -> list:
+        results = [None] * len(keys)
+        if not self.enabled:
+            return results
+        with self._lock:
+            for i, key in enumerate(keys):
+                result = self._entries.get(key)
+                if result is not None:
+                    self._entries.move_to_end(key)
+                    results[i] = result
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return results
+
+    def put_many(self, items: dict):
+        """Ajoute {clé: résultat} ; écrit aussi dans SQLite si la persistance est activée."""
+        if not self.enabled or not items:
+            return
+        with self._lock:
+            for key, result in items.items():
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_size:
+                evicted.append(self._entries.popitem(last=False)[0])
+            if self._db is not None:
+                # Rang d'écriture lu dans le fichier, qui peut être partagé par plusieurs workers
+                self._db.execute("BEGIN IMMEDIATE")
+                seq = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM results").fetchone()[0]
+                # Seules les entrées encore en mémoire sont écrites, chacune avec son rang
+                rows = []
+                for key, result in items.items():
+                    if key in self._entries:
+                        seq += 1
+                        rows.append((key, json.dumps(result, ensure_ascii=False), seq))
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO results (key, value, seq) VALUES (?, ?, ?)", rows
+                )
+                # Après l'insertion : un lot plus grand que le cache ne réécrit pas ce qu'il évince
+                self._db.executemany("DELETE FROM results WHERE key = ?", [(key,) for key in evicted])
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_id": self.model_id,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "persistent": self._db is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,149 @@
+# app/startup.py
+"""Démarrage du service de sentiment : chargement en arrière-plan, hors ligne, threads.
+
+Le modèle n'est plus chargé à l'import : uvicorn ouvre son port tout de
+suite, le chargement et une passe avant de préchauffage se font dans un
+thread, et ``GET /health`` répond 503 tant que le modèle n'est pas prêt.
+
+Variables d'environnement :
+
+- ``SENTIMENT_MODEL_DIR`` : répertoire local du modèle et du tokenizer
+  (produit par ``python -m app.backends download``). Dans ce cas rien n'est
+  demandé au hub ; ``SENTIMENT_OFFLINE=1`` l'impose aussi sans répertoire
+  local (cache Hugging Face déjà rempli) ;
+- ``SENTIMENT_WORKERS`` (ou ``WEB_CONCURRENCY``) : nombre de workers du noeud.
+  Les coeurs disponibles sont partagés entre eux pour éviter la
+  sur-souscription ;
+- ``SENTIMENT_INTRA_OP_THREADS`` / ``SENTIMENT_INTER_OP_THREADS`` : valeurs
+  explicites, prioritaires sur le calcul automatique ;
+- ``SENTIMENT_POOL_PROCESSES`` : nombre de processus d'inférence partageant
+  les poids (voir ``app.pool`` ; 0 par défaut, inférence dans ce processus) ;
+- ``SENTIMENT_TIERS`` : niveaux de modèle chargés (voir ``app.tiers``), l'un
+  après l'autre, le niveau par défaut en premier. Le service est prêt quand
+  tous le sont.
+"""
+import os
+import threading
+import time
+
+WARMUP_TEXTS = ["je veux résilier", "Merci beaucoup, le service est parfait."]
+
+
+def available_cpus() -> int:
+    # Respecte l'affinité CPU (limites de conteneur) quand elle est disponible
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def pool_processes() -> int:
+    return int(os.getenv("SENTIMENT_POOL_PROCESSES", "0"))
+
+
+def thread_settings() -> tuple[int, int]:
+    """(intra-op, inter-op) pour un worker, selon le nombre de workers du noeud."""
+    workers = int(os.getenv("SENTIMENT_WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+    intra = max(1, available_cpus() // max(1, workers))
+    intra = int(os.getenv("SENTIMENT_INTRA_OP_THREADS", intra))
+    inter = int(os.getenv("SENTIMENT_INTER_OP_THREADS", "1"))
+    return intra, inter
+
+
+class ModelLoader:
+    """Charge un ``SentimentAnalyzer`` par niveau dans un thread et expose leur état."""
+
+    def __init__(self):
+        self.status = "pending"
+        self.error = None
+        self.load_seconds = None
+        self.analyzer = None
+        self.analyzers = {}
+        self.pools = {}
+        self._ready = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    @property
+    def healthy(self) -> bool:
+        """Prêt et sans worker de pool mort (le service répond encore, avec moins de workers)."""
+        return self.ready and all(pool.healthy for pool in self.pools.values())
+
+    def start(self):
+        if self.status != "pending":
+            return
+        self.status = "loading"
+        threading.Thread(target=self._load, name="sentiment-model-loader", daemon=True).start()
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            from app.backends import resolve_model_source
+            from app.tiers import enabled_tiers
+
+            tiers = enabled_tiers()
+            if all(resolve_model_source(tier)[1] for tier in tiers):
+                # Avant l'import de transformers : aucune requête vers le hub
+                os.environ.setdefault("HF_HUB_OFFLINE", "1")
+                os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+            from app.model import SentimentAnalyzer
+
+            analyzers = {}
+            for tier in tiers:
+                analyzer = SentimentAnalyzer(tier=tier)
+                if pool_processes() > 0:
+                    from app.pool import InferencePool
+
+                    # Fork avant toute passe avant dans ce processus ; les workers se préchauffent
+                    self.pools[tier] = InferencePool(analyzer, pool_processes())
+                else:
+                    # Préchauffage : un texte seul puis un lot, avant la première vraie requête
+                    analyzer.infer(WARMUP_TEXTS[:1])
+                    analyzer.infer(WARMUP_TEXTS)
+                analyzers[tier] = analyzer
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        else:
+            self.analyzers = analyzers
+            self.analyzer = analyzers[tiers[0]]
+            self.status = "ready"
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self._ready.set()
+
+    def get(self, tier: str = None):
+        """Analyseur du niveau demandé (niveau par défaut si ``tier`` est vide)."""
+        if not tier:
+            return self.analyzer
+        if tier not in self.analyzers:
+            raise KeyError(tier)
+        return self.analyzers[tier]
+
+    def predict_batch(self, texts, tier: str = None):
+        """``SentimentAnalyzer.predict_batch`` du niveau, via son pool de processus s'il existe."""
+        analyzer = self.get(tier)
+        pool = self.pools.get(analyzer.tier)
+        return analyzer.predict_batch(texts, infer=pool.infer if pool else None)
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+    def wait(self, timeout: float = None) -> bool:
+        self._ready.wait(timeout)
+        return self.ready
+
+    def describe(self) -> dict:
+        intra, inter = thread_settings()
+        return {
+            "status": "degraded" if self.ready and not self.healthy else self.status,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "intra_op_threads": intra,
+            "inter_op_threads": inter,
+            "tiers": list(self.analyzers),
+            "default_tier": self.analyzer.tier if self.analyzer else None,
+            "pools": {tier: pool.describe() for tier, pool in self.pools.items()},
+        }
@@ -0,0 +1,109 @@
+# app/tiers.py
+"""Niveaux de modèle de sentiment : compromis précision / vitesse.
+
+- ``accurate`` : BERT multilingue 5 classes (1 à 5 étoiles), le modèle de
+  référence du service ;
+- ``fast`` : DistilBERT multilingue distillé, 3 classes, environ deux fois
+  plus rapide sur CPU. Pensé pour les traitements en masse (imports CSV,
+  rattrapages), les vues interactives des conseillers gardant ``accurate``.
+
+Variables d'environnement :
+
+- ``SENTIMENT_TIER`` : niveau utilisé quand la requête n'en précise pas
+  (``accurate`` par défaut) ;
+- ``SENTIMENT_TIERS`` : niveaux chargés au démarrage, séparés par des
+  virgules (par défaut le seul niveau par défaut). Chaque niveau chargé
+  occupe sa mémoire et, en mode pool, ses propres processus ;
+- ``SENTIMENT_<NIVEAU>_MODEL_DIR`` : répertoire local du modèle d'un niveau
+  (``SENTIMENT_MODEL_DIR`` reste accepté pour ``accurate``).
+
+Chaque résultat porte ``classes`` : le label de chaque entrée de
+``probabilities``, toujours ordonnées du plus négatif au plus positif
+(``SCALE``). Les niveaux n'ont pas le même nombre de classes (5 pour
+``accurate``, 3 pour ``fast``), mais ``probabilities[0]`` est toujours la
+classe la plus négative.
+
+La comparaison des niveaux se fait avec ``python -m app.benchmark_tiers``.
+"""
+import os
+
+REFERENCE_TIER = "accurate"
+
+# labels : label du service pour chaque label du modèle (``config.id2label``, en minuscules) ;
+# l'ordre des logits est lu dans la configuration du modèle chargé, jamais supposé
+TIERS = {
+    "accurate": {
+        "model": "nlptown/bert-base-multilingual-uncased-sentiment",
+        "labels": {
+            "1 star": "très négatif",
+            "2 stars": "négatif",
+            "3 stars": "neutre",
+            "4 stars": "positif",
+            "5 stars": "très positif",
+        },
+    },
+    "fast": {
+        "model": "lxyuan/distilbert-base-multilingual-cased-sentiments-student",
+        "labels": {"negative": "négatif", "neutral": "neutre", "positive": "positif"},
+    },
+}
+
+# Ordre des classes dans les réponses, du plus négatif au plus positif
+SCALE = ["très négatif", "négatif", "neutre", "positif", "très positif"]
+
+POLARITY = {
+    "très négatif": "négatif",
+    "négatif": "négatif",
+    "neutre": "neutre",
+    "positif": "positif",
+    "très positif": "positif",
+}
+
+
+def default_tier() -> str:
+    return os.getenv("SENTIMENT_TIER", REFERENCE_TIER)
+
+
+def enabled_tiers() -> list[str]:
+    """Niveaux à charger, le niveau par défaut en premier."""
+    names = [default_tier()]
+    for name in os.getenv("SENTIMENT_TIERS", "").split(","):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    for name in names:
+        if name not in TIERS:
+            raise ValueError(f"Niveau de sentiment inconnu : {name} ({', '.join(TIERS)})")
+    return names
+
+
+def model_dir(tier: str) -> str | None:
+    """Répertoire local configuré pour ``tier``, s'il y en a un."""
+    path = os.getenv(f"SENTIMENT_{tier.upper()}_MODEL_DIR")
+    if not path and tier == REFERENCE_TIER:
+        path = os.getenv("SENTIMENT_MODEL_DIR")
+    return path
+
+
+def logit_labels(tier: str, id2label: dict) -> list[str]:
+    """Label du service de chaque logit du modèle de ``tier``, d'après son ``config.id2label``."""
+    names = TIERS[tier]["labels"]
+    labels = []
+    for i in range(len(id2label)):
+        name = str(id2label[i]).lower()
+        if name not in names:
+            raise ValueError(
+                f"Label de modèle inconnu pour le niveau {tier} : {id2label[i]} (attendus : {', '.join(names)})"
+            )
+        labels.append(names[name])
+    return labels
+
+
+def output_order(labels: list[str]) -> list[int]:
+    """Indices des logits (de labels ``labels``) rangés selon ``SCALE``."""
+    return sorted(range(len(labels)), key=lambda i: SCALE.index(labels[i]))
+
+
+def polarity(label: str) -> str:
+    """Négatif, neutre ou positif : seule échelle commune aux modèles 3 et 5 classes."""
+    return POLARITY.get(label, label)
@@ -0,0 +1,148 @@
+# app/tokens.py
+"""Tokenisation en cache et regroupement des textes par longueur.
+
+- ``TokenCache`` : cache LRU des encodages (non paddés) par texte, de taille
+  ``SENTIMENT_TOKEN_CACHE_SIZE`` ; les textes absents sont tokenisés ensemble
+  en un seul appel au tokenizer rapide.
+- ``length_buckets`` : les textes d'un lot sont triés par nombre de tokens et
+  découpés en groupes de longueurs voisines ; chaque groupe n'est paddé qu'à
+  son plus long texte, et ``SENTIMENT_BUCKET_TOKENS`` borne le nombre de
+  tokens (padding compris) d'une passe avant ;
+- ``split_windows`` : en mode texte long, un encodage complet (non tronqué)
+  est découpé en fenêtres chevauchantes de la taille maximale du modèle,
+  chacune avec son nombre de tokens nouveaux.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+
+# En dessous, les textes sont regroupés sans se soucier du padding
+SHORT_TEXT_TOKENS = 64
+
+
+class TokenCache:
+    def __init__(self, tokenizer, max_size: int = None, truncation: bool = True):
+        self.tokenizer = tokenizer
+        self.truncation = truncation
+        self.max_size = max_size if max_size is not None else int(os.getenv("SENTIMENT_TOKEN_CACHE_SIZE", "4096"))
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, texts: list[str]) -> list[dict]:
+        """Encodage de chaque texte : {nom d'entrée: tableau int64 non paddé}."""
+        encodings = [None] * len(texts)
+        with self._lock:
+            for i, text in enumerate(texts):
+                entry = self._entries.get(text)
+                if entry is not None:
+                    self._entries.move_to_end(text)
+                    encodings[i] = entry
+            self.hits += sum(encoding is not None for encoding in encodings)
+
+        missing = list(dict.fromkeys(text for text, encoding in zip(texts, encodings) if encoding is None))
+        if missing:
+            tokenized = self.tokenizer(missing, truncation=self.truncation, padding=False)
+            names = [name for name in INPUT_NAMES if name in tokenized]
+            fresh = {
+                text: {name: np.asarray(tokenized[name][j], dtype=np.int64) for name in names}
+                for j, text in enumerate(missing)
+            }
+            with self._lock:
+                self.misses += len(missing)
+                if self.max_size > 0:
+                    for text, encoding in fresh.items():
+                        self._entries[text] = encoding
+                        self._entries.move_to_end(text)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+            encodings = [encoding if encoding is not None else fresh[text] for text, encoding in zip(texts, encodings)]
+        return encodings
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def length_buckets(lengths: list[int], max_items: int, max_tokens: int) -> list[list[int]]:
+    """Indices des textes groupés par longueur croissante.
+
+    Un groupe s'arrête à ``max_items`` textes, quand ``taille x longueur max``
+    dépasserait ``max_tokens``, ou quand le padding dépasserait la moitié des
+    tokens du groupe (sauf pour les textes courts, où une passe de plus coûte
+    davantage que le padding). Un texte seul forme toujours un groupe.
+    """
+    order = np.argsort(lengths, kind="stable")
+    buckets, current, current_tokens = [], [], 0
+    for index in order.tolist():
+        # Trié par longueur croissante : le texte courant est le plus long du groupe
+        length = lengths[index]
+        padded = (len(current) + 1) * length
+        too_wasteful = length > SHORT_TEXT_TOKENS and padded > 2 * (current_tokens + length)
+        if current and (len(current) >= max_items or padded > max_tokens or too_wasteful):
+            buckets.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += length
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def split_windows(encoding: dict, max_length: int, overlap: int, max_windows: int) -> tuple[list[dict], list[int]]:
+    """Fenêtres chevauchantes d'un encodage complet et nombre de tokens nouveaux de chacune.
+
+    Le premier et le dernier token (``[CLS]``/``[SEP]`` ou équivalents) sont
+    recopiés dans chaque fenêtre. Au-delà de ``max_windows`` fenêtres, les
+    départs sont répartis uniformément sur le texte (début et fin toujours
+    couverts) : le coût d'un texte reste borné quelle que soit sa longueur.
+
+    Les tokens nouveaux d'une fenêtre sont ceux que la précédente ne couvre
+    pas : pondérées par ce nombre, les fenêtres comptent chaque token du texte
+    une seule fois, dernière fenêtre (qui recouvre souvent beaucoup la
+    précédente) comprise.
+    """
+    if len(encoding["input_ids"]) <= max_length:
+        return [encoding], [len(encoding["input_ids"])]
+
+    body_length = len(encoding["input_ids"]) - 2
+    window = max_length - 2
+    stride = max(1, window - overlap)
+    last_start = body_length - window
+    starts = list(range(0, last_start, stride)) + [last_start]
+    if len(starts) > max_windows:
+        starts = np.linspace(0, last_start, max_windows).round().astype(int).tolist()
+
+    windows = []
+    for start in starts:
+        windows.append({
+            name: np.concatenate([array[:1], array[1 + start:1 + start + window], array[-1:]])
+            for name, array in encoding.items()
+        })
+    weights = [window] + [min(window, start - previous) for previous, start in zip(starts, starts[1:])]
+    return windows, weights
+
+
+def pad(encodings: list[dict], pad_token_id: int) -> dict:
+    """Entrées paddées au plus long encodage du groupe."""
+    length = max(len(encoding["input_ids"]) for encoding in encodings)
+    batch = {}
+    for name in encodings[0]:
+        fill = pad_token_id if name == "input_ids" else 0
+        array = np.full((len(encodings), length), fill, dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            array[row, :len(encoding[name])] = encoding[name]
+        batch[name] = array
+    return batch
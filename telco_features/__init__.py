@@ -0,0 +1,30 @@
+"""Encodage des features telco partagé par les services de churn et de recommandation.
+
+``shared_encoder`` est unique par processus : un service qui héberge les deux
+modèles (ou deux vues enregistrées) n'encode chaque client qu'une fois.
+Taille du cache : ``TELCO_FEATURE_CACHE_SIZE`` (0 pour le désactiver).
+
+Avec ``TELCO_SHARED_FEATURES=0``, ``shared_encoder`` vaut ``None`` et
+``register`` renvoie toujours ``None`` : les services gardent alors le
+prétraitement de leur propre pipeline.
+"""
+import os
+
+from telco_features.encoder import FeatureEncoder, FeatureView, spec_from_preprocessor
+
+shared_encoder = None
+if os.getenv("TELCO_SHARED_FEATURES", "1") == "1":
+    shared_encoder = FeatureEncoder(max_size=int(os.getenv("TELCO_FEATURE_CACHE_SIZE", "10000")))
+
+
+def register(spec_or_preprocessor):
+    """Vue de l'encodage partagé pour un prétraitement, ou ``None`` s'il n'est pas utilisable."""
+    if shared_encoder is None:
+        return None
+    try:
+        return shared_encoder.register(spec_or_preprocessor)
+    except ValueError:
+        return None
+
+
+__all__ = ["FeatureEncoder", "FeatureView", "register", "shared_encoder", "spec_from_preprocessor"]
@@ -0,0 +1,200 @@
+"""Encodage partagé des 19 colonnes telco, avec cache par hash des features.
+
+Un client est encodé une seule fois en un vecteur compact : une case par
+colonne numérique (valeur brute) et une case par colonne catégorielle (code de
+la valeur dans un vocabulaire commun, ``-1`` si inconnue). Ce vecteur est mis
+en cache sous le hash des features du client.
+
+Le vecteur partagé reste en ``float64`` : stocker les valeurs brutes en
+``float32`` décale la standardisation d'un ulp et suffit à faire basculer des
+seuils d'arbres. Les matrices projetées pour les modèles sont en ``float32``,
+le type que les arbres sklearn utilisent en interne.
+
+Chaque modèle consommateur (churn, recommandation...) enregistre son
+prétraitement et obtient une ``FeatureView`` qui projette les vecteurs
+partagés vers sa propre matrice d'entrée (one-hot + standardisation), par
+simples indexations NumPy, sans DataFrame ni ``ColumnTransformer``.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+UNKNOWN = -1
+
+
+def spec_from_preprocessor(preprocessor) -> dict:
+    """Décrit un ``ColumnTransformer`` ajusté (OneHotEncoder + StandardScaler).
+
+    Même format que les métadonnées de ``CompiledModel`` du service de churn :
+    ``categorical`` = [(colonne, début, valeurs)], ``numeric`` = [(colonne,
+    index, moyenne, écart-type)].
+    """
+    categorical, numeric = [], []
+    for name, transformer, columns in preprocessor.transformers_:
+        output = preprocessor.output_indices_[name]
+        if output.stop == output.start:
+            continue
+        if hasattr(transformer, "categories_"):
+            if getattr(transformer, "drop_idx_", None) is not None:
+                raise ValueError("OneHotEncoder avec 'drop' non supporté par l'encodage partagé")
+            start = output.start
+            for column, values in zip(columns, transformer.categories_):
+                categorical.append((column, start, [str(v) for v in values]))
+                start += len(values)
+        elif hasattr(transformer, "scale_") or hasattr(transformer, "mean_"):
+            n = len(columns)
+            mean = transformer.mean_ if transformer.mean_ is not None else np.zeros(n)
+            scale = transformer.scale_ if transformer.scale_ is not None else np.ones(n)
+            for offset, column in enumerate(columns):
+                numeric.append((column, output.start + offset, float(mean[offset]), float(scale[offset])))
+        else:
+            raise ValueError(f"Transformateur '{name}' non supporté par l'encodage partagé")
+
+    n_outputs = max(output.stop for output in preprocessor.output_indices_.values())
+    return {"categorical": categorical, "numeric": numeric, "n_outputs": n_outputs}
+
+
+class FeatureView:
+    """Projection des vecteurs partagés vers la matrice d'entrée d'un modèle."""
+
+    def __init__(self, encoder: "FeatureEncoder", spec: dict):
+        self.encoder = encoder
+        self.n_outputs = spec["n_outputs"]
+
+        # Colonne catégorielle : case du vecteur partagé + table code -> colonne one-hot
+        self.categorical = []
+        for column, start, values in spec["categorical"]:
+            slot = encoder.slot(column, "cat")
+            vocabulary = encoder.vocabularies[column]
+            codes = np.array([vocabulary[value] for value in values], dtype=np.int64)
+            lookup = np.full(len(vocabulary) + 1, UNKNOWN, dtype=np.int64)
+            lookup[codes] = np.arange(start, start + len(values))
+            self.categorical.append((slot, lookup))
+
+        self.numeric_slots = np.array([encoder.slot(column, "num") for column, _, _, _ in spec["numeric"]], dtype=np.int64)
+        self.numeric_index = np.array([index for _, index, _, _ in spec["numeric"]], dtype=np.int64)
+        self.mean = np.array([mean for _, _, mean, _ in spec["numeric"]], dtype=np.float64)
+        self.scale = np.array([scale for _, _, _, scale in spec["numeric"]], dtype=np.float64)
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Matrice ``float32`` identique à la sortie du prétraitement enregistré."""
+        n_rows = len(vectors)
+        rows = np.arange(n_rows)
+        X = np.zeros((n_rows, self.n_outputs), dtype=np.float32)
+
+        for slot, lookup in self.categorical:
+            codes = vectors[:, slot].astype(np.int64)
+            # Codes ajoutés au vocabulaire après cette vue, ou inconnus : aucune colonne
+            codes[(codes < 0) | (codes >= len(lookup) - 1)] = len(lookup) - 1
+            columns = lookup[codes]
+            known = columns != UNKNOWN
+            X[rows[known], columns[known]] = 1.0
+
+        X[:, self.numeric_index] = (vectors[:, self.numeric_slots] - self.mean) / self.scale
+        return X
+
+
+class FeatureEncoder:
+    """Encodeur des clients telco en vecteurs partagés, avec cache LRU."""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.slots = {}  # (colonne, "cat" | "num") -> case du vecteur
+        self.vocabularies = {}  # colonne catégorielle -> {valeur: code}
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def slot(self, column: str, kind: str) -> int:
+        return self.slots[(column, kind)]
+
+    def register(self, spec_or_preprocessor) -> FeatureView:
+        """Ajoute les colonnes et catégories d'un modèle puis renvoie sa vue.
+
+        Les codes existants ne changent jamais ; si le vocabulaire s'agrandit,
+        le cache est vidé car ses vecteurs ignorent les nouvelles catégories.
+        """
+        spec = spec_or_preprocessor
+        if not isinstance(spec, dict):
+            spec = spec_from_preprocessor(spec_or_preprocessor)
+
+        with self._lock:
+            changed = False
+            for column, _, values in spec["categorical"]:
+                changed |= self._add_slot(column, "cat")
+                vocabulary = self.vocabularies.setdefault(column, {})
+                for value in values:
+                    if value not in vocabulary:
+                        vocabulary[value] = len(vocabulary)
+                        changed = True
+            for column, _, _, _ in spec["numeric"]:
+                changed |= self._add_slot(column, "num")
+            if changed:
+                self._entries.clear()
+            return FeatureView(self, spec)
+
+    def _add_slot(self, column: str, kind: str) -> bool:
+        if (column, kind) in self.slots:
+            return False
+        self.slots[(column, kind)] = len(self.slots)
+        return True
+
+    def make_key(self, record: dict) -> str:
+        features = {column: record.get(column) for column, _ in self.slots}
+        payload = json.dumps(features, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _encode_one(self, record: dict) -> np.ndarray:
+        vector = np.empty(len(self.slots), dtype=np.float64)
+        for (column, kind), slot in self.slots.items():
+            if kind == "cat":
+                vector[slot] = self.vocabularies[column].get(str(record[column]), UNKNOWN)
+            else:
+                vector[slot] = record[column]
+        return vector
+
+    def encode(self, records: list[dict]) -> np.ndarray:
+        """Vecteurs partagés (clients x cases) ; chaque client n'est encodé qu'une fois."""
+        with self._lock:
+            vectors = np.empty((len(records), len(self.slots)), dtype=np.float64)
+            for row, record in enumerate(records):
+                if not self.enabled:
+                    vectors[row] = self._encode_one(record)
+                    continue
+                key = self.make_key(record)
+                vector = self._entries.get(key)
+                if vector is None:
+                    self.misses += 1
+                    vector = self._encode_one(record)
+                    self._entries[key] = vector
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                vectors[row] = vector
+            return vectors
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "slots": len(self.slots),
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }